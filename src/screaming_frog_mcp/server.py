@@ -9,25 +9,49 @@ CSV exports are generated on-demand into temp dirs.
 """
 
 import asyncio
+import base64
+import contextlib
 import csv
+import functools
 import glob
+import hashlib
+import heapq
 import io
 import ipaddress
+import json
 import logging
+import logging.handlers
+import math
+import mmap
+import multiprocessing
 import os
+import pickle
 import re
 import shutil
+import sqlite3
+import struct
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import uuid
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import accumulate
 from pathlib import Path
 from typing import Optional, Union
 from urllib.parse import urlparse
 
 from dotenv import load_dotenv
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
+
+try:
+    import numpy as np
+except ImportError:  # optional: pip install "screaming-frog-mcp[fast]"
+    np = None
 
 load_dotenv()
 
@@ -43,10 +67,98 @@ SF_CLI_PATH = os.getenv(
 SF_DATA_DIR = Path.home() / ".ScreamingFrogSEOSpider" / "ProjectInstanceData"
 TEMP_EXPORT_BASE = Path.home() / ".cache" / "sf-mcp" / "exports"
 EXPORT_TTL_SECONDS = 3600  # 1 hour
-MAX_CONCURRENT_CRAWLS = 2
+# Crawl concurrency is sized from the host: each SF JVM is budgeted
+# CRAWL_MEMORY_GB and CRAWL_CPUS_PER_CRAWL cores, and a new crawl starts only
+# while available memory (less the RSS still to come from running crawls) and
+# the load average leave room for it. SF_MAX_CONCURRENT_CRAWLS pins the limit.
+MAX_CONCURRENT_CRAWLS = int(os.getenv("SF_MAX_CONCURRENT_CRAWLS", "0"))  # 0 = from host resources
+CRAWL_MEMORY_GB = float(os.getenv("SF_CRAWL_MEMORY_GB", "4"))
+CRAWL_MEMORY_RESERVE_GB = 2  # left for the OS and everything else
+CRAWL_CPUS_PER_CRAWL = 2
+CRAWL_MAX_LOAD_PER_CPU = 1.0
+CRAWL_ADMIT_RETRY_SECONDS = 30
+
+# Crawl records (queued, running and finished) persisted across server restarts;
+# on startup running crawls whose server is gone are re-adopted by PID
+CRAWL_REGISTRY_PATH = Path.home() / ".cache" / "sf-mcp" / "crawls.sqlite"
+CRAWL_ADOPT_POLL_SECONDS = 5
+CRAWL_LOG_TAIL_BYTES = 256 * 1024  # read back from an adopted crawl's log to recover its progress
+MAX_QUEUED_CRAWLS = 100  # crawls beyond the concurrency limit wait in a priority queue
 MAX_ACTIVE_EXPORTS = 10
+
+# Export timeouts scale with the crawl's on-disk size; bulk exports get extra time
+EXPORT_TIMEOUT_BASE = 300
+EXPORT_TIMEOUT_PER_GB = 600
+EXPORT_TIMEOUT_PER_BULK = 300
+EXPORT_TIMEOUT_MAX = 6 * 3600
 MAX_CRAWL_SIZE = 100000
 
+# Crawl and export output is drained continuously into a ring buffer and a rotating log
+LOG_DIR = Path.home() / ".cache" / "sf-mcp" / "logs"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 2
+LOG_TTL_SECONDS = 7 * 24 * 3600  # 1 week
+CRAWL_OUTPUT_TAIL_LINES = 200
+CRAWL_LOG_POLL_SECONDS = 0.5  # crawls write straight to their log, which is tailed
+
+# Live crawl progress parsed from SF's periodic log lines
+CRAWL_RATE_WINDOW_SECONDS = 60
+CRAWL_STALL_SECONDS = 300  # no new URLs for this long counts as stalled
+PROGRESS_NOTIFY_INTERVAL = 2
+MAX_STATUS_WAIT_SECONDS = 300
+
+# Sidecar file holding the byte offset of every data row in an exported CSV
+ROW_INDEX_SUFFIX = ".rowidx"
+
+# Per-export manifest of files, row counts, headers and column types, so
+# nothing is counted twice and file lookups never walk the export directory
+MANIFEST_NAME = "manifest.json"
+ROW_COUNT_CHUNK_BYTES = 16 * 1024 * 1024
+MAX_COUNT_WORKERS = 4  # processes, so the byte scans really run in parallel
+# Below this many bytes to describe, spawning workers costs more than it saves
+PARALLEL_COUNT_MIN_BYTES = 512 * 1024 * 1024
+TYPE_SAMPLE_ROWS = 1000
+
+# Per-export SQLite database used by query_crawl_data
+EXPORT_DB_NAME = "export.sqlite"
+SQLITE_BATCH_ROWS = 5000
+SQLITE_INDEXED_COLUMNS = (
+    "Address", "Status Code", "Indexability", "Indexability Status", "Content Type", "Crawl Depth",
+)
+QUERY_TIMEOUT_SECONDS = 60
+MAX_QUERY_ROWS = 1000
+
+# Row ordinals matched by a read_crawl_data filter, kept so later pages and
+# match counts skip the rescan. Bounded by total bytes, least recently used first out
+MATCH_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Optional trigram index (export_crawl build_indexes=True) for substring
+# filters on URL columns, built in blocks of rows to bound memory
+TRIGRAM_INDEX_SUFFIX = ".trgm"
+TRIGRAM_COLUMNS = ("Address", "Source", "Destination")
+TRIGRAM_BUILD_ROWS = 500_000
+
+# Optional bitmap indexes (also built by build_indexes=True) over low-cardinality
+# columns; a column with more distinct values than this is left unindexed
+BITMAP_INDEX_SUFFIX = ".bmidx"
+BITMAP_COLUMNS = ("Status Code", "Indexability", "Indexability Status", "Content Type", "Crawl Depth")
+BITMAP_MAX_VALUES = 255
+
+# Index candidates are checked row by row only while they are a small share
+# of the file; beyond that a sequential scan is cheaper than seeking
+INDEX_MAX_CANDIDATE_SHARE = 0.2
+
+# Optional columnar cache (export_crawl columnar=True): each CSV transcoded to
+# typed, memory-mapped columns in row groups, so reads skip CSV parsing
+COLUMNAR_SUFFIX = ".cols"
+COLUMNAR_GROUP_ROWS = 65536
+
+# read_crawl_data sort_by: sorted permutations cached next to the CSV, built by
+# an external merge sort that spills runs of this many rows to disk
+SORT_INDEX_SUFFIX = ".sort"
+SORT_RUN_ROWS = 250_000
+SORT_READ_ROWS = 65536  # permutation entries read per chunk when paging a filtered sort
+
 DEFAULT_EXPORT_TABS = (
     "Internal:All,Response Codes:All,Page Titles:All,"
     "Meta Description:All,H1:All,H2:All,Images:All,"
@@ -55,12 +167,43 @@ DEFAULT_EXPORT_TABS = (
 
 # --- State ---
 
-# Track running crawl processes: crawl_id -> {pid, proc, url, label, started}
+# Track running crawl processes:
+# crawl_id -> {pid, proc, url, label, started, output, log_path, drain, progress, adopted}
 _running_crawls: dict = {}
+_crawl_registry_restored = False
+
+# Crawls waiting for a free slot: crawl_id -> {url, label, cmd, priority, seq, queued}.
+# Started highest priority first, then in submission order.
+_queued_crawls: dict = {}
+_crawl_queue_seq = 0
+_crawl_scheduler_lock = asyncio.Lock()
+_crawl_queue_watcher: Optional[asyncio.Task] = None
 
-# Track temp export dirs: export_id -> {path, created, db_id}
+# Track temp export dirs:
+# export_id -> {path, created, db_id, rows, cache_key, stamp, items, manifest}
 _export_dirs: dict = {}
 
+# Export jobs (blocking and background): export_id -> {task, proc, started, status, result, ...}
+_export_jobs: dict = {}
+
+# Completed exports by content key (db_id, export spec, crawl DB stamp) -> export_id
+_export_cache: dict = {}
+
+# Filtered-read matches: (export_id, file, filter fingerprint) -> array("I") of row
+# ordinals, or for sorted reads an array("B") with a 1 for every matching row
+_match_cache: OrderedDict = OrderedDict()
+_match_cache_bytes = 0
+_match_cache_lock = threading.Lock()  # reads record matches from worker threads
+
+# export_id -> asyncio.Lock held while an export's SQLite database is built, so
+# a query during (or two first queries after) an export never ingest it twice
+_ingest_locks: dict = {}
+
+# One lock per sidecar being built (row index, sort permutation) or filter
+# being scanned for the first time, so concurrent reads do that work only once
+_build_locks: dict = {}
+_build_locks_guard = threading.Lock()
+
 
 def _validate_url(url: str) -> Optional[str]:
     """Returns error message if URL is invalid/dangerous, None if OK."""
@@ -132,11 +275,28 @@ SF_GUI_WARNING = (
 
 # --- Server ---
 
-mcp = FastMCP("Screaming Frog SEO Spider")
+@contextlib.asynccontextmanager
+async def _lifespan(server: FastMCP):
+    """Clean up stale exports and logs, then re-adopt crawls from the registry.
+
+    The cleanup runs here rather than at import so the spawned workers of
+    _build_manifest can import this module without touching any files.
+    """
+    _cleanup_old_exports()
+    _cleanup_old_logs()
+    try:
+        await _restore_crawls()
+    except Exception:
+        logger.exception("Failed to restore crawls from the registry")
+    yield
+
+
+mcp = FastMCP("Screaming Frog SEO Spider", lifespan=_lifespan)
 
 
 def _cleanup_old_exports():
     """Remove temp export dirs older than EXPORT_TTL_SECONDS."""
+    global _match_cache_bytes
     now = time.time()
     expired = [
         eid for eid, info in _export_dirs.items()
@@ -148,11 +308,30 @@ def _cleanup_old_exports():
             shutil.rmtree(path, ignore_errors=True)
         del _export_dirs[eid]
 
-    # Also clean orphaned dirs on disk — skip symlinks
+    for key in [k for k, eid in _export_cache.items() if eid not in _export_dirs]:
+        del _export_cache[key]
+    for eid in [eid for eid, lock in _ingest_locks.items() if eid not in _export_dirs and not lock.locked()]:
+        del _ingest_locks[eid]
+    with _match_cache_lock:
+        for key in [k for k in _match_cache if k[0] not in _export_dirs]:
+            matches = _match_cache.pop(key)
+            _match_cache_bytes -= matches.itemsize * len(matches)
+
+    finished = [
+        eid for eid, job in _export_jobs.items()
+        if job["status"] != "running" and eid not in _export_dirs
+        and now - job["started"] > EXPORT_TTL_SECONDS
+    ]
+    for eid in finished:
+        del _export_jobs[eid]
+
+    # Also clean orphaned dirs on disk — skip symlinks, tracked exports and running jobs
     if TEMP_EXPORT_BASE.exists():
         for d in TEMP_EXPORT_BASE.iterdir():
             if d.is_symlink():
                 d.unlink()  # remove the symlink itself, never follow
+            elif d.name in _export_dirs or d.name in _export_jobs:
+                continue
             elif d.is_dir():
                 age = now - d.stat().st_mtime
                 if age > EXPORT_TTL_SECONDS:
@@ -163,18 +342,2498 @@ def _cleanup_completed_crawls():
     """Remove completed crawl entries from memory."""
     completed = [
         cid for cid, info in _running_crawls.items()
-        if info["proc"].returncode is not None
+        if info["proc"].returncode is not None and not info.get("exporting")
     ]
     for cid in completed:
         del _running_crawls[cid]
 
 
+def _cleanup_old_logs():
+    """Remove crawl/export logs (and their rotated backups) older than LOG_TTL_SECONDS."""
+    now = time.time()
+    if LOG_DIR.exists():
+        for f in LOG_DIR.iterdir():
+            if f.is_file() and not f.is_symlink() and now - f.stat().st_mtime > LOG_TTL_SECONDS:
+                f.unlink(missing_ok=True)
+
+
+# SF logs lines like "SpiderProgress [mActive=5, mCompleted=1234, mWaiting=56, mCompleted=95.66%]".
+# The looser alternatives cover other SF versions' wording.
+_PROGRESS_CRAWLED_RE = re.compile(r"(?:mCompleted=|URLs? crawled[:=]?\s*)(\d+)(?![\d.%])", re.I)
+_PROGRESS_REMAINING_RE = re.compile(r"(?:mWaiting=|remaining[:=]?\s*)(\d+)(?![\d.%])", re.I)
+_PROGRESS_RATE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:URLs?|URIs?)\s*/\s*s(?:ec)?\b", re.I)
+
+# SF names each saved crawl's folder in ProjectInstanceData by a UUID (the
+# Database ID) and mentions it when the crawl is saved
+_DB_ID_RE = re.compile(
+    r"(?:database|db|crawl)[\s_-]*id\b\W*([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})",
+    re.I,
+)
+
+
+def _new_crawl_progress(started: float) -> dict:
+    """Empty progress record for a crawl; filled in by _update_crawl_progress."""
+    return {
+        "crawled": None,
+        "remaining": None,
+        "reported_rate": None,
+        "changed": started,
+        "samples": deque(maxlen=1000),
+    }
+
+
+def _update_crawl_progress(progress: dict, line: str) -> None:
+    """Update a crawl's progress record from one line of SF output."""
+    m = _PROGRESS_CRAWLED_RE.search(line)
+    if not m:
+        return
+    now = time.time()
+    crawled = int(m.group(1))
+    if crawled != progress["crawled"]:
+        progress["crawled"] = crawled
+        progress["changed"] = now
+        progress["samples"].append((now, crawled))
+
+    m = _PROGRESS_REMAINING_RE.search(line)
+    if m:
+        progress["remaining"] = int(m.group(1))
+    m = _PROGRESS_RATE_RE.search(line)
+    if m:
+        progress["reported_rate"] = float(m.group(1))
+
+
+def _crawl_rate(progress: dict) -> Optional[float]:
+    """URLs/sec — as reported by SF, else measured over the recent window."""
+    if progress["reported_rate"] is not None:
+        return progress["reported_rate"]
+    samples = progress["samples"]
+    cutoff = time.time() - CRAWL_RATE_WINDOW_SECONDS
+    while len(samples) > 2 and samples[0][0] < cutoff:
+        samples.popleft()
+    if len(samples) < 2 or samples[-1][0] <= samples[0][0]:
+        return None
+    return (samples[-1][1] - samples[0][1]) / (samples[-1][0] - samples[0][0])
+
+
+def _format_crawl_progress(progress: dict, running: bool) -> str:
+    """Progress lines for crawl_status. Empty if SF has not logged any yet."""
+    if progress["crawled"] is None:
+        return ""
+    crawled = progress["crawled"]
+    remaining = progress["remaining"]
+    text = f"URLs crawled: {crawled}"
+    if remaining is not None:
+        total = crawled + remaining
+        pct = 100 * crawled / total if total else 100.0
+        text += f" ({remaining} remaining, {pct:.1f}%)"
+    text += "\n"
+    if running:
+        rate = _crawl_rate(progress)
+        if rate is not None:
+            text += f"Rate: {rate:.1f} URLs/sec\n"
+        idle = time.time() - progress["changed"]
+        if idle > CRAWL_STALL_SECONDS:
+            text += (
+                f"WARNING: No new URLs for {int(idle // 60)}m {int(idle % 60)}s "
+                f"— the crawl may be stalled.\n"
+            )
+    return text
+
+
+async def _report_crawl_progress(ctx: Optional[Context], progress: dict) -> None:
+    """Send an MCP progress notification (a no-op if the client did not ask for them)."""
+    if ctx is None or progress["crawled"] is None:
+        return
+    crawled = progress["crawled"]
+    remaining = progress["remaining"]
+    total = crawled + remaining if remaining is not None else None
+    message = f"{crawled} URLs crawled"
+    if remaining is not None:
+        message += f", {remaining} remaining"
+    rate = _crawl_rate(progress)
+    if rate is not None:
+        message += f", {rate:.1f} URLs/sec"
+    try:
+        await ctx.report_progress(crawled, total, message)
+    except Exception:
+        logger.debug("Failed to send progress notification", exc_info=True)
+
+
+async def _drain_stream(stream: asyncio.StreamReader, info: dict, handler: logging.Handler) -> None:
+    """Copy one subprocess pipe into the job's ring buffer and log file until EOF."""
+    while True:
+        try:
+            raw = await stream.readline()
+        except ValueError:
+            # Line exceeded the stream limit; the reader has discarded it
+            continue
+        if not raw:
+            break
+        line = raw.decode("utf-8", errors="replace").rstrip()
+        info["output"].append(line)
+        if "progress" in info:
+            _update_crawl_progress(info["progress"], line)
+        handler.emit(logging.makeLogRecord({"msg": line}))
+
+
+async def _drain_process_output(proc: asyncio.subprocess.Process, info: dict) -> None:
+    """Keep reading an export's stdout/stderr so a chatty JVM never blocks on a full pipe.
+
+    Output goes to a bounded ring buffer and a rotating log file (for
+    post-mortems), so memory stays flat however long the export runs.
+    Crawls write to their log directly; see _follow_crawl_log.
+    """
+    handler = logging.handlers.RotatingFileHandler(
+        info["log_path"],
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUPS,
+        encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    try:
+        await asyncio.gather(
+            _drain_stream(proc.stdout, info, handler),
+            _drain_stream(proc.stderr, info, handler),
+        )
+    except Exception:
+        logger.exception("Failed to drain crawl output")
+    finally:
+        handler.close()
+
+
+def _rotate_crawl_log(log_path: Path) -> None:
+    """Shift log -> log.1 -> log.2 ... like RotatingFileHandler, then truncate in place.
+
+    The crawl keeps its O_APPEND descriptor, so it carries on writing at the
+    start of the emptied file; lines it writes between the copy and the
+    truncate are lost.
+    """
+    for i in range(LOG_BACKUPS - 1, 0, -1):
+        older = log_path.with_name(f"{log_path.name}.{i}")
+        if older.exists():
+            os.replace(older, log_path.with_name(f"{log_path.name}.{i + 1}"))
+    shutil.copyfile(log_path, log_path.with_name(f"{log_path.name}.1"))
+    os.truncate(log_path, 0)
+
+
+def _record_crawl_line(info: dict, line: str) -> None:
+    """Take one line of crawl output: ring buffer, progress, and any Database ID SF logs."""
+    info["output"].append(line)
+    _update_crawl_progress(info["progress"], line)
+    m = _DB_ID_RE.search(line)
+    if m:
+        info["logged_db_id"] = m.group(1).lower()
+
+
+async def _follow_crawl_log(info: dict) -> None:
+    """Tail a crawl's log file into its ring buffer and progress until the process exits.
+
+    Crawls write their output straight to the log rather than through a pipe,
+    so they keep running (and logging) if the server goes away, and a restarted
+    server picks up from info["log_offset"].
+    """
+    log_path = info["log_path"]
+    offset = info.get("log_offset", 0)
+    partial = b""
+    while True:
+        finished = info["proc"].returncode is not None
+        try:
+            with open(log_path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < offset:
+                    offset, partial = 0, b""  # rotated under us
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        except OSError:
+            logger.exception("Failed to read crawl log")
+            return
+        if data:
+            offset += len(data)
+            lines = (partial + data).split(b"\n")
+            partial = lines.pop()
+            for raw in lines:
+                _record_crawl_line(info, raw.decode("utf-8", errors="replace").rstrip())
+        if finished:
+            if partial:
+                _record_crawl_line(info, partial.decode("utf-8", errors="replace").rstrip())
+            return
+        if offset > LOG_MAX_BYTES and not partial:
+            try:
+                _rotate_crawl_log(log_path)
+                offset = 0
+            except OSError:
+                logger.warning("Failed to rotate crawl log", exc_info=True)
+        await asyncio.sleep(CRAWL_LOG_POLL_SECONDS)
+
+
 # Ensure export base dir exists with restricted permissions
 TEMP_EXPORT_BASE.mkdir(parents=True, exist_ok=True)
 os.chmod(TEMP_EXPORT_BASE, 0o700)
+LOG_DIR.mkdir(parents=True, exist_ok=True)
+os.chmod(LOG_DIR, 0o700)
+
+
+# --- Export file helpers ---
+
+
+def _resolve_export_file(export_id: str, file: str) -> tuple:
+    """Find a CSV inside an export. Returns (export_dir, path, error message)."""
+    if export_id not in _export_dirs:
+        active = ", ".join(_export_dirs.keys()) if _export_dirs else "none"
+        return None, None, f"Unknown export_id: {export_id}\nActive exports: {active}"
+
+    export_dir = _export_dirs[export_id]["path"]
+    if not export_dir.exists():
+        del _export_dirs[export_id]
+        return None, None, "Export directory has been cleaned up. Run export_crawl again."
+
+    # Find the file in the manifest - exact relative path first, then by name
+    # Sanitize: only ever match the bare filename when searching
+    safe_file = Path(file).name  # extract just the filename, no directory components
+    available = list(_export_manifest(export_id)["files"])
+    matches = [f for f in available if Path(f) == Path(file)]
+    if not matches:
+        matches = [f for f in available if Path(f).name == safe_file]
+    if not matches:
+        # Try partial match with safe filename
+        matches = [f for f in available if safe_file in Path(f).name]
+    if not matches:
+        return None, None, (
+            f"File '{safe_file}' not found.\nAvailable files:\n"
+            + "\n".join(f"  {f}" for f in available)
+        )
+    target = export_dir / matches[0]
+
+    # Final containment check
+    if not _path_is_contained(target, export_dir):
+        return None, None, "ERROR: Invalid file path."
+
+    return export_dir, target, None
+
 
-# Clean up on startup
-_cleanup_old_exports()
+def _resolve_columns(header: list, names: Optional[str]) -> tuple:
+    """Map comma-separated column names to header positions (case-insensitive).
+
+    Returns (indices, error message). No names selects every column.
+    """
+    if not names:
+        return list(range(len(header))), None
+    positions = {}
+    for i, col in enumerate(header):
+        positions.setdefault(col.lower(), i)
+    indices = []
+    unknown = []
+    for name in names.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if name.lower() in positions:
+            indices.append(positions[name.lower()])
+        else:
+            unknown.append(name)
+    if unknown:
+        return None, (
+            f"ERROR: Unknown column(s): {', '.join(unknown)}\n"
+            f"Available columns: {', '.join(header)}"
+        )
+    return indices, None
+
+
+def _project(row: list, indices: list) -> list:
+    """Pick the cells at `indices` from a parsed row (short rows pad with '')."""
+    width = len(row)
+    return [row[i] if i < width else "" for i in indices]
+
+
+def _read_fingerprint(path: Path, *filters) -> str:
+    """Identify a file version plus the filters a cursor was issued for."""
+    st = path.stat()
+    key = json.dumps([path.name, st.st_size, st.st_mtime_ns, *filters])
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def _encode_cursor(position: int, matched: int, fingerprint: str) -> str:
+    """Opaque cursor: where the next page's scan starts and how many rows came before."""
+    raw = json.dumps({"p": position, "n": matched, "f": fingerprint}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, fingerprint: str) -> Optional[tuple]:
+    """Return (byte position, rows before) from a cursor, or None if it is invalid
+    or was issued for a different file version or filter."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        position, matched = int(data["p"]), int(data["n"])
+    except (ValueError, TypeError, KeyError):
+        return None
+    if data.get("f") != fingerprint or position < 0 or matched < 0:
+        return None
+    return position, matched
+
+
+def _format_table(columns: list, rows: list) -> str:
+    """Render rows as a pipe-separated text table, truncating long cells."""
+    # Header
+    output = " | ".join(columns) + "\n"
+    output += "-+-".join("-" * min(len(c), 30) for c in columns) + "\n"
+
+    # Rows
+    for row in rows:
+        values = []
+        for i in range(len(columns)):
+            val = row[i] if i < len(row) else ""
+            val = "" if val is None else str(val)
+            if len(val) > 80:
+                val = val[:77] + "..."
+            values.append(val)
+        output += " | ".join(values) + "\n"
+    return output
+
+
+# --- Export cache ---
+#
+# Exporting launches a JVM and loads the whole crawl, which takes 20-60s even
+# for small crawls. A repeat export of the same crawl with the same options
+# reuses the previous export directory instead.
+
+
+def _split_spec(value: Optional[str]) -> list:
+    """Normalize a comma-separated export option into a sorted, de-duplicated list."""
+    if not value:
+        return []
+    return sorted({item.strip() for item in value.split(",") if item.strip()})
+
+
+def _crawl_db_stats(db_id: str) -> Optional[tuple[int, int]]:
+    """(latest mtime_ns, total bytes) of a saved crawl's files.
+
+    Returns None when the crawl's folder can't be found in ProjectInstanceData.
+    """
+    db_dir = SF_DATA_DIR / db_id
+    if not db_dir.is_dir() or not _path_is_contained(db_dir, SF_DATA_DIR):
+        return None
+    latest = db_dir.stat().st_mtime_ns
+    total = 0
+    for f in db_dir.rglob("*"):
+        if f.is_file():
+            st = f.stat()
+            latest = max(latest, st.st_mtime_ns)
+            total += st.st_size
+    return latest, total
+
+
+def _crawl_db_stamp(stats: Optional[tuple[int, int]]) -> Optional[str]:
+    """Modification stamp of a saved crawl, from _crawl_db_stats."""
+    return f"{stats[0]}:{stats[1]}" if stats else None
+
+
+def _export_timeout(stats: Optional[tuple[int, int]], n_bulk: int) -> int:
+    """Seconds to allow an export: grows with crawl size and bulk export count."""
+    size_gb = stats[1] / (1024 ** 3) if stats else 0
+    timeout = EXPORT_TIMEOUT_BASE + EXPORT_TIMEOUT_PER_GB * size_gb + EXPORT_TIMEOUT_PER_BULK * n_bulk
+    return int(min(timeout, EXPORT_TIMEOUT_MAX))
+
+
+def _export_cache_key(db_id: str, tabs: str, bulk_export: Optional[str],
+                      save_report: Optional[str], stamp: Optional[str]) -> str:
+    """Content key for an export: same crawl, same options, unchanged DB -> same key."""
+    spec = {
+        "db_id": db_id,
+        "tabs": _split_spec(tabs),
+        "bulk_export": _split_spec(bulk_export),
+        "save_report": _split_spec(save_report),
+        # Without a stamp (crawl folder not found) the export TTL bounds staleness
+        "stamp": stamp,
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def _cached_export(key: str) -> Optional[str]:
+    """Return the export_id cached under `key` if its files are still on disk."""
+    export_id = _export_cache.get(key)
+    if export_id is None:
+        return None
+    info = _export_dirs.get(export_id)
+    if info is None or not info["path"].exists():
+        _export_cache.pop(key, None)
+        _export_dirs.pop(export_id, None)
+        return None
+    return export_id
+
+
+def _export_items(tabs: str, bulk_export: Optional[str], save_report: Optional[str]) -> list:
+    """Every file-producing item in an export request, as (option, name) pairs."""
+    return (
+        [("tabs", t) for t in _split_spec(tabs)]
+        + [("bulk_export", b) for b in _split_spec(bulk_export)]
+        + [("save_report", r) for r in _split_spec(save_report)]
+    )
+
+
+def _item_file_key(name: str) -> str:
+    """Normalize an export item or CSV stem so 'Internal:All' matches 'internal_all.csv'."""
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def _find_reusable_files(db_id: str, stamp: Optional[str], items: list) -> dict:
+    """Locate files for `items` in earlier exports of the same, unchanged crawl.
+
+    Returns {item: (export dir, CSV path)}. Items whose file can't be identified
+    by name are left out, so they simply get exported again.
+    """
+    found = {}
+    for export_id, info in list(_export_dirs.items()):
+        if info["db_id"] != db_id or info.get("stamp") != stamp or not info["rows"]:
+            continue
+        wanted = {_item_file_key(name): (option, name) for option, name in items
+                  if (option, name) in info.get("items", ()) and (option, name) not in found}
+        if not wanted or not info["path"].exists():
+            continue
+        for rel_path in _export_manifest(export_id)["files"]:
+            item = wanted.pop(_item_file_key(Path(rel_path).stem), None)
+            if item:
+                found[item] = (info["path"], info["path"] / rel_path)
+    return found
+
+
+def _link_export_file(src: Path, src_dir: Path, dest_dir: Path) -> str:
+    """Hard-link a CSV (and its sidecars) from one export into another.
+
+    Hard links keep the data alive when the source export expires, without
+    copying it. Falls back to a copy across filesystems. Returns the new
+    relative path.
+    """
+    rel_path = src.relative_to(src_dir)
+    (dest_dir / rel_path).parent.mkdir(parents=True, exist_ok=True)
+    for f in src.parent.glob(glob.escape(src.name) + "*"):
+        if not f.is_file() or f.is_symlink() or f.name.endswith(".tmp"):
+            continue
+        target = dest_dir / rel_path.parent / f.name
+        try:
+            os.link(f, target)
+        except OSError:
+            shutil.copy2(f, target)
+    return str(rel_path)
+
+
+def _export_summary(export_id: str) -> str:
+    """Export ID, file listing and next steps for a completed export."""
+    info = _export_dirs[export_id]
+    file_list = []
+    for rel_path, entry in _export_manifest(export_id)["files"].items():
+        size = entry["size"]
+        size_str = f"{size / 1024:.1f} KB" if size < 1024 * 1024 else f"{size / (1024 * 1024):.1f} MB"
+        file_list.append(f"  {rel_path} ({size_str}, {entry['rows']} rows)")
+
+    return (
+        f"Export ID: {export_id}\n"
+        f"DB ID: {info['db_id']}\n\n"
+        f"Files:\n" + "\n".join(file_list) + "\n\n"
+        f"Use read_crawl_data(export_id='{export_id}', file='filename.csv') to read data,\n"
+        f"or query_crawl_data(export_id='{export_id}', file='filename.csv', where=...) for SQL filtering,\n"
+        f"or aggregate_crawl_data(export_id='{export_id}', file='filename.csv', group_by=...) for counts and stats.\n"
+        f"Files auto-delete after 1 hour."
+    )
+
+
+# --- Export manifest ---
+#
+# Counting rows used to mean running csv.reader over every exported file,
+# doubling the I/O on multi-GB bulk exports. Rows are now counted by a byte
+# scan and recorded in manifest.json, keyed by relative path with the size
+# and mtime the count was taken at.
+
+# Every byte except '"' and newline, for bytes.translate(delete=...)
+_NOT_QUOTE_OR_NEWLINE = bytes(b for b in range(256) if b not in b'"\n')
+
+
+def _count_csv_rows(path: Path) -> int:
+    """Count data rows in a CSV without parsing it, handling quoted newlines.
+
+    The file is scanned through mmap in chunks. Each chunk is reduced to just
+    its quotes and newlines, then adjacent quote pairs are dropped (an empty
+    field or an escaped quote — neither changes whether a newline is inside a
+    field). What remains is almost all newlines, so tracking quote state only
+    costs anything where a field really contains a line break.
+    """
+    size = path.stat().st_size
+    if size == 0:
+        return 0
+    newlines = 0
+    in_quotes = False
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for start in range(0, size, ROW_COUNT_CHUNK_BYTES):
+            chunk = mm[start:start + ROW_COUNT_CHUNK_BYTES]
+            reduced = chunk.translate(None, _NOT_QUOTE_OR_NEWLINE).replace(b'""', b"")
+            for i, piece in enumerate(reduced.split(b'"')):
+                if i:
+                    in_quotes = not in_quotes
+                if not in_quotes:
+                    newlines += piece.count(b"\n")
+        ends_with_newline = mm[size - 1] == ord("\n")
+    records = newlines + (0 if ends_with_newline else 1)
+    return max(0, records - 1)  # subtract header
+
+
+def _load_manifest(export_dir: Path) -> dict:
+    """Read an export's manifest (empty if missing or unreadable)."""
+    try:
+        manifest = json.loads((export_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"files": {}}
+    manifest.setdefault("files", {})
+    return manifest
+
+
+def _write_manifest(export_dir: Path, manifest: dict) -> None:
+    """Atomically write an export's manifest."""
+    tmp_path = export_dir / f"{MANIFEST_NAME}.tmp"
+    tmp_path.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    os.replace(tmp_path, export_dir / MANIFEST_NAME)
+
+
+def _describe_csv(path: Path) -> dict:
+    """Row count, header and sampled column types of one CSV, for the manifest."""
+    header, data_start = _read_csv_header(path)
+    sample = []
+    with open(path, "rb") as fh:
+        for _, row in _iter_csv_rows(fh, data_start):
+            sample.append(row)
+            if len(sample) >= TYPE_SAMPLE_ROWS:
+                break
+    return {
+        "rows": _count_csv_rows(path),
+        "header": header,
+        "types": _infer_column_types(header, sample),
+    }
+
+
+def _build_manifest(export_dir: Path, known: Optional[dict] = None) -> dict:
+    """Write the manifest for every CSV in an export and return it.
+
+    `known` holds manifest entries from earlier exports (for hard-linked
+    files); an entry whose size and mtime still match is reused as-is. The
+    remaining files are described in worker processes when there is enough
+    data to pay for spawning them, otherwise (or if the pool can't start)
+    one after another in this process.
+    """
+    known = known or {}
+    files = {}
+    to_count = []
+    for path in sorted(export_dir.rglob("*.csv")):
+        if not _path_is_contained(path, export_dir):
+            continue
+        rel_path = str(path.relative_to(export_dir))
+        st = path.stat()
+        entry = known.get(rel_path)
+        if (entry and "header" in entry and entry.get("size") == st.st_size
+                and entry.get("mtime_ns") == st.st_mtime_ns):
+            files[rel_path] = entry
+        else:
+            files[rel_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            to_count.append((rel_path, path))
+
+    paths = [path for _, path in to_count]
+    described = None
+    total_bytes = sum(files[rel_path]["size"] for rel_path, _ in to_count)
+    if len(paths) > 1 and total_bytes >= PARALLEL_COUNT_MIN_BYTES:
+        workers = min(MAX_COUNT_WORKERS, len(paths), os.cpu_count() or 1)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            ) as pool:
+                described = list(pool.map(_describe_csv, paths))
+        except (OSError, BrokenProcessPool) as exc:
+            logger.warning("Counting %s in-process; worker pool failed: %s", export_dir, exc)
+    if described is None:
+        described = [_describe_csv(path) for path in paths]
+    for (rel_path, _), info in zip(to_count, described):
+        files[rel_path].update(info)
+
+    manifest = {"files": files}
+    _write_manifest(export_dir, manifest)
+    return manifest
+
+
+def _export_manifest(export_id: str) -> dict:
+    """An export's manifest, loaded from disk (or rebuilt) on first use."""
+    info = _export_dirs[export_id]
+    if info.get("manifest") is None:
+        manifest = _load_manifest(info["path"])
+        if not manifest["files"]:
+            manifest = _build_manifest(info["path"])
+        info["manifest"] = manifest
+    return info["manifest"]
+
+
+# --- SQLite ingestion ---
+#
+# After an export, every CSV is loaded into one SQLite database per export
+# (one table per file) so query_crawl_data can push filtering, grouping and
+# sorting into SQLite instead of paging rows through the client.
+
+_INT_RE = re.compile(r"-?\d+")
+_REAL_RE = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def _infer_column_types(header: list, sample: list) -> list:
+    """Guess INTEGER / REAL / TEXT for each column from a sample of rows."""
+    types = []
+    for i in range(len(header)):
+        kind = None
+        for row in sample:
+            val = row[i] if i < len(row) else ""
+            if val == "":
+                continue
+            if _INT_RE.fullmatch(val):
+                kind = kind or "INTEGER"
+            elif _REAL_RE.fullmatch(val):
+                kind = "REAL"
+            else:
+                kind = "TEXT"
+                break
+        types.append(kind or "TEXT")
+    return types
+
+
+def _sqlite_table_name(path: Path, taken: set) -> str:
+    """Derive a unique, SQL-safe table name from a CSV filename."""
+    base = re.sub(r"[^a-z0-9]+", "_", path.stem.lower()).strip("_") or "data"
+    if base[0].isdigit():
+        base = f"t_{base}"
+    name = base
+    n = 2
+    while name in taken:
+        name = f"{base}_{n}"
+        n += 1
+    taken.add(name)
+    return name
+
+
+def _quote_ident(name: str) -> str:
+    """Quote an SQL identifier (column names contain spaces and punctuation)."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _ingest_csv(conn: sqlite3.Connection, path: Path, table: str, types: Optional[list] = None) -> int:
+    """Load one CSV into `table` with inferred (or given) column types. Returns rows loaded."""
+    header, data_start = _read_csv_header(path)
+    if not header:
+        return 0
+
+    # SQLite rejects duplicate column names, compared case-insensitively
+    columns = []
+    seen = set()
+    for name in header:
+        unique = name or "column"
+        n = 2
+        while unique.casefold() in seen:
+            unique = f"{name or 'column'} ({n})"
+            n += 1
+        columns.append(unique)
+        seen.add(unique.casefold())
+
+    with open(path, "rb") as fh:
+        rows = (row for _, row in _iter_csv_rows(fh, data_start))
+        sample = []
+        for row in rows:
+            sample.append(row)
+            if len(sample) >= TYPE_SAMPLE_ROWS:
+                break
+        if types is None or len(types) != len(columns):
+            types = _infer_column_types(columns, sample)
+
+        converters = []
+        for kind in types:
+            if kind == "INTEGER":
+                # Leave out-of-range integers as text rather than overflow SQLite
+                converters.append(
+                    lambda v: int(v) if len(v) <= 18 and _INT_RE.fullmatch(v) else (v or None)
+                )
+            elif kind == "REAL":
+                converters.append(lambda v: float(v) if _REAL_RE.fullmatch(v) else (v or None))
+            else:
+                converters.append(lambda v: v)
+        width = len(columns)
+
+        def convert(row):
+            if len(row) < width:
+                row = row + [""] * (width - len(row))
+            return [conv(val) for conv, val in zip(converters, row)]
+
+        col_defs = ", ".join(f"{_quote_ident(c)} {t}" for c, t in zip(columns, types))
+        conn.execute(f"CREATE TABLE {_quote_ident(table)} ({col_defs})")
+        insert = (
+            f"INSERT INTO {_quote_ident(table)} VALUES ({', '.join('?' * width)})"
+        )
+
+        total = 0
+        batch = [convert(row) for row in sample]
+        while batch:
+            conn.executemany(insert, batch)
+            total += len(batch)
+            batch = []
+            for row in rows:
+                batch.append(convert(row))
+                if len(batch) >= SQLITE_BATCH_ROWS:
+                    break
+
+    _create_sqlite_indexes(conn, table, columns)
+    return total
+
+
+def _create_sqlite_indexes(conn: sqlite3.Connection, table: str, columns: list) -> None:
+    """Index the commonly filtered SEO columns that exist in `table`."""
+    for col in SQLITE_INDEXED_COLUMNS:
+        if col in columns:
+            conn.execute(
+                f"CREATE INDEX {_quote_ident(f'{table}__{col}')} "
+                f"ON {_quote_ident(table)} ({_quote_ident(col)})"
+            )
+
+
+def _copy_sqlite_table(conn: sqlite3.Connection, src_db: Path, src_file: str, table: str) -> Optional[int]:
+    """Copy an already-ingested file's table from another export's database.
+
+    Returns the row count, or None if the source has no table for `src_file`.
+    """
+    conn.commit()  # ATTACH is not allowed inside a transaction
+    conn.execute("ATTACH DATABASE ? AS src", (str(src_db),))
+    try:
+        found = conn.execute(
+            "SELECT table_name, rows FROM src.sf_files WHERE file = ?", (src_file,)
+        ).fetchone()
+        if not found:
+            return None
+        src_table, rows = found
+        info = conn.execute(f"PRAGMA src.table_info({_quote_ident(src_table)})").fetchall()
+        columns = [col[1] for col in info]
+        col_defs = ", ".join(f"{_quote_ident(col[1])} {col[2]}" for col in info)
+        conn.execute(f"CREATE TABLE {_quote_ident(table)} ({col_defs})")
+        conn.execute(f"INSERT INTO {_quote_ident(table)} SELECT * FROM src.{_quote_ident(src_table)}")
+        conn.commit()
+    finally:
+        conn.execute("DETACH DATABASE src")
+    _create_sqlite_indexes(conn, table, columns)
+    return rows
+
+
+def _ingest_export(export_dir: Path, sources: Optional[dict] = None, manifest: Optional[dict] = None) -> Path:
+    """Load every CSV in an export into its SQLite database. Returns the DB path.
+
+    `sources` maps a file's relative path to (export dir, relative path) of the
+    same file in an earlier export; its table is copied instead of re-parsed.
+    """
+    db_path = export_dir / EXPORT_DB_NAME
+    tmp_path = export_dir / f"{EXPORT_DB_NAME}.tmp"
+    tmp_path.unlink(missing_ok=True)
+    sources = sources or {}
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("CREATE TABLE sf_files (file TEXT PRIMARY KEY, table_name TEXT, rows INTEGER)")
+        taken = {"sf_files"}
+        files = (manifest or _build_manifest(export_dir))["files"]
+        for rel_path, entry in files.items():
+            path = export_dir / rel_path
+            table = _sqlite_table_name(path, taken)
+            rows = None
+            if rel_path in sources:
+                src_dir, src_file = sources[rel_path]
+                src_db = src_dir / EXPORT_DB_NAME
+                if src_db.exists():
+                    try:
+                        rows = _copy_sqlite_table(conn, src_db, src_file, table)
+                    except sqlite3.Error:
+                        logger.warning("Could not copy %s from %s; re-ingesting", src_file, src_db)
+                        conn.execute(f"DROP TABLE IF EXISTS {_quote_ident(table)}")
+            if rows is None:
+                rows = _ingest_csv(conn, path, table, entry.get("types"))
+            conn.execute("INSERT INTO sf_files VALUES (?, ?, ?)", (rel_path, table, rows))
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+    return db_path
+
+
+def _query_authorizer(action, arg1, arg2, db_name, trigger):
+    """Only allow reads: query_crawl_data must never modify or attach anything."""
+    if action in (sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION):
+        return sqlite3.SQLITE_OK
+    return sqlite3.SQLITE_DENY
+
+
+# --- Predicate filters ---
+#
+# read_crawl_data's `where` argument is a small filter language, parsed once
+# per call into an AST and compiled into closures over column positions:
+#
+#   Response Time > 2 AND Word Count < 200
+#   Status Code in (404, 410) OR (Indexability = Non-Indexable AND Address ~ '/blog/')
+#
+# Operators: = != > >= < <= ~ (regex) !~ contains, not contains, in (...), not in (...)
+# Column names may be bare words, or `backticked` / "quoted" if they clash with
+# a keyword. Values may be bare words, numbers or 'quoted' strings. String
+# comparisons are case-insensitive; = and in also match numerically ("2" = 2.0).
+#
+# AST nodes: ("and", [nodes]), ("or", [nodes]), ("not", node),
+#            ("cmp", column, op, value) — value is a string, or a list for in.
+
+_WHERE_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<str>'(?:[^']|'')*')
+      | (?P<ident>`[^`]*`|"(?:[^"]|"")*")
+      | (?P<op>>=|<=|!=|<>|==|!~|=|>|<|~|\(|\)|,)
+      | (?P<word>[^\s'"`()<>=!~,]+)
+    )""", re.X)
+_WHERE_KEYWORDS = {"and", "or", "not", "in", "contains"}
+_NUMERIC_OPS = {">", ">=", "<", "<="}
+
+
+def _tokenize_where(text: str) -> list:
+    """Split a where clause into (kind, text) tokens."""
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _WHERE_TOKEN_RE.match(text, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"unexpected character at position {pos}: {text[pos:pos + 10]!r}")
+        pos = m.end()
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == "str":
+            value = value[1:-1].replace("''", "'")
+        elif kind == "ident":
+            value = value[1:-1].replace('""', '"') if value[0] == '"' else value[1:-1]
+        elif kind == "op":
+            value = {"==": "=", "<>": "!="}.get(value, value)
+        elif kind == "word" and value.lower() in _WHERE_KEYWORDS:
+            kind, value = "kw", value.lower()
+        tokens.append((kind, value))
+    return tokens
+
+
+def _parse_where(text: str) -> tuple:
+    """Parse a where clause into an AST. Raises ValueError on bad syntax."""
+    tokens = _tokenize_where(text)
+    pos = 0
+
+    def peek(offset=0):
+        return tokens[pos + offset] if pos + offset < len(tokens) else (None, None)
+
+    def take():
+        nonlocal pos
+        pos += 1
+        return tokens[pos - 1]
+
+    def expect(kind, value):
+        if peek() != (kind, value):
+            raise ValueError(f"expected '{value}' but found {peek()[1] or 'end of clause'!r}")
+        take()
+
+    def parse_or():
+        nodes = [parse_and()]
+        while peek() == ("kw", "or"):
+            take()
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def parse_and():
+        nodes = [parse_not()]
+        while peek() == ("kw", "and"):
+            take()
+            nodes.append(parse_not())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def parse_not():
+        if peek() == ("kw", "not"):
+            take()
+            return ("not", parse_not())
+        if peek() == ("op", "("):
+            take()
+            node = parse_or()
+            expect("op", ")")
+            return node
+        return parse_condition()
+
+    def parse_column():
+        if peek()[0] == "ident":
+            return take()[1]
+        words = []
+        while peek()[0] == "word":
+            words.append(take()[1])
+        if not words:
+            raise ValueError(f"expected a column name but found {peek()[1] or 'end of clause'!r}")
+        return " ".join(words)
+
+    def parse_value():
+        if peek()[0] == "str":
+            return take()[1]
+        words = []
+        while peek()[0] == "word":
+            words.append(take()[1])
+        if not words:
+            raise ValueError(f"expected a value but found {peek()[1] or 'end of clause'!r}")
+        return " ".join(words)
+
+    def parse_condition():
+        column = parse_column()
+        kind, value = peek()
+        negate = False
+        if (kind, value) == ("kw", "not"):
+            take()
+            negate = True
+            kind, value = peek()
+            if (kind, value) not in (("kw", "in"), ("kw", "contains")):
+                raise ValueError("'not' after a column must be followed by 'in' or 'contains'")
+        if (kind, value) == ("kw", "in"):
+            take()
+            expect("op", "(")
+            values = [parse_value()]
+            while peek() == ("op", ","):
+                take()
+                values.append(parse_value())
+            expect("op", ")")
+            return ("cmp", column, "not in" if negate else "in", values)
+        if (kind, value) == ("kw", "contains"):
+            take()
+            return ("cmp", column, "not contains" if negate else "contains", parse_value())
+        if kind == "op" and value not in ("(", ")", ","):
+            take()
+            return ("cmp", column, value, parse_value())
+        raise ValueError(f"expected an operator after {column!r}")
+
+    if not tokens:
+        raise ValueError("empty clause")
+    ast = parse_or()
+    if pos != len(tokens):
+        raise ValueError(f"unexpected {peek()[1]!r}")
+    return ast
+
+
+def _parse_number(text: str) -> Optional[float]:
+    """Parse a numeric cell or literal; None if it isn't one."""
+    if _REAL_RE.fullmatch(text):
+        return float(text)
+    return None
+
+
+def _compile_predicate(ast: tuple, header: list):
+    """Compile a where AST into a fn(row) -> bool over positional rows.
+
+    Raises ValueError for unknown columns or ill-typed comparisons.
+    """
+    kind = ast[0]
+    if kind in ("and", "or"):
+        parts = [_compile_predicate(node, header) for node in ast[1]]
+        if kind == "and":
+            return lambda row: all(p(row) for p in parts)
+        return lambda row: any(p(row) for p in parts)
+    if kind == "not":
+        inner = _compile_predicate(ast[1], header)
+        return lambda row: not inner(row)
+
+    _, column, op, value = ast
+    indices, err = _resolve_columns(header, column)
+    if err:
+        raise ValueError(f"unknown column {column!r}")
+    i = indices[0]
+
+    def cell(row):
+        return row[i] if i < len(row) else ""
+
+    if op in _NUMERIC_OPS:
+        number = _parse_number(value)
+        if number is None:
+            raise ValueError(f"{column} {op} needs a number, got {value!r}")
+        compare = {
+            ">": float.__gt__, ">=": float.__ge__, "<": float.__lt__, "<=": float.__le__,
+        }[op]
+
+        def numeric(row):
+            n = _parse_number(cell(row))
+            return n is not None and compare(n, number)
+        return numeric
+
+    if op in ("=", "!=", "in", "not in"):
+        values = value if isinstance(value, list) else [value]
+        texts = {v.lower() for v in values}
+        numbers = {n for n in map(_parse_number, values) if n is not None}
+
+        def equals(row):
+            c = cell(row)
+            if c.lower() in texts:
+                return True
+            if numbers:
+                n = _parse_number(c)
+                return n is not None and n in numbers
+            return False
+        if op in ("=", "in"):
+            return equals
+        return lambda row: not equals(row)
+
+    if op in ("contains", "not contains"):
+        needle = value.lower()
+        if op == "contains":
+            return lambda row: needle in cell(row).lower()
+        return lambda row: needle not in cell(row).lower()
+
+    if op in ("~", "!~"):
+        try:
+            pattern = re.compile(value, re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"invalid regex {value!r}: {e}")
+        if op == "~":
+            return lambda row: pattern.search(cell(row)) is not None
+        return lambda row: pattern.search(cell(row)) is None
+
+    raise ValueError(f"unsupported operator {op!r}")
+
+
+def _where_columns(ast: Optional[tuple], header: list) -> set:
+    """Positions of the columns a where AST reads."""
+    if ast is None:
+        return set()
+    if ast[0] in ("and", "or"):
+        return set().union(*(_where_columns(node, header) for node in ast[1]))
+    if ast[0] == "not":
+        return _where_columns(ast[1], header)
+    indices, err = _resolve_columns(header, ast[1])
+    return set() if err else {indices[0]}
+
+
+# --- Row index ---
+#
+# Exported CSVs can have millions of rows, so paging by re-parsing from the top
+# gets slower the deeper you go. The row index is a sidecar file next to each
+# CSV holding the byte offset of every data row, so `offset=N` is a seek.
+#
+# Layout: header (magic, CSV size, CSV mtime_ns, row count) followed by one
+# native uint64 offset per data row. The size/mtime pair detects stale indexes.
+
+_ROW_INDEX_MAGIC = b"SFRIDX01"
+_ROW_INDEX_HEADER = struct.Struct("=8sQqQ")
+
+
+def _iter_csv_records(fh, start: int):
+    """Yield (offset, raw bytes) for each CSV record in a binary file, from `start`.
+
+    Quote-aware: a newline inside a quoted field does not end the record.
+    An escaped quote ("") flips the quote state twice, so counting quotes per
+    line is enough to track whether we are inside a field.
+    """
+    fh.seek(start)
+    record_start = start
+    pending = []
+    in_quotes = False
+    for line in fh:
+        pending.append(line)
+        if line.count(b'"') % 2:
+            in_quotes = not in_quotes
+        if in_quotes:
+            continue
+        record = pending[0] if len(pending) == 1 else b"".join(pending)
+        pending.clear()
+        yield record_start, record
+        record_start += len(record)
+    if pending:
+        # Unterminated quote at EOF — hand back what is left as one record
+        yield record_start, b"".join(pending)
+
+
+def _iter_csv_rows(fh, start: int):
+    """Yield (end offset, row) for each non-blank CSV row, from byte offset `start`.
+
+    The end offset is where the next record starts, so it can be used to resume.
+    """
+    position = [start]
+
+    def lines():
+        for offset, record in _iter_csv_records(fh, start):
+            position[0] = offset + len(record)
+            yield record.decode("utf-8", errors="replace")
+
+    # csv.reader consumes exactly one complete record per row, so `position`
+    # always matches the row just yielded.
+    for row in csv.reader(lines()):
+        if row:
+            yield position[0], row
+
+
+def _read_csv_header(path: Path) -> tuple[list, int]:
+    """Return (column names, byte offset of the first data row)."""
+    with open(path, "rb") as fh:
+        for offset, record in _iter_csv_records(fh, 0):
+            text = record.decode("utf-8-sig", errors="replace")
+            header = next(csv.reader([text]), [])
+            return header, offset + len(record)
+    return [], 0
+
+
+def _build_row_index(csv_path: Path, index_path: Path) -> int:
+    """Scan a CSV once and write its row index. Returns the data row count."""
+    st = csv_path.stat()
+    offsets = array("Q")
+    with open(csv_path, "rb") as fh:
+        records = _iter_csv_records(fh, 0)
+        next(records, None)  # header
+        for offset, record in records:
+            if record.strip(b"\r\n"):
+                offsets.append(offset)
+
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, "wb") as out:
+        out.write(_ROW_INDEX_HEADER.pack(_ROW_INDEX_MAGIC, st.st_size, st.st_mtime_ns, len(offsets)))
+        offsets.tofile(out)
+    os.replace(tmp_path, index_path)
+    return len(offsets)
+
+
+def _build_lock(key) -> threading.Lock:
+    """The lock serializing builds of one sidecar file (or first scans of one filter)."""
+    with _build_locks_guard:
+        return _build_locks.setdefault(key, threading.Lock())
+
+
+def _row_index_count(index_path: Path, st: os.stat_result) -> Optional[int]:
+    """Row count of a row index built from the CSV as it is now, else None."""
+    try:
+        with open(index_path, "rb") as fh:
+            magic, size, mtime_ns, count = _ROW_INDEX_HEADER.unpack(fh.read(_ROW_INDEX_HEADER.size))
+    except (OSError, struct.error):
+        return None
+    if magic == _ROW_INDEX_MAGIC and size == st.st_size and mtime_ns == st.st_mtime_ns:
+        return count
+    return None
+
+
+def _ensure_row_index(csv_path: Path) -> tuple[Path, int]:
+    """Return (index path, data row count), building the index if missing or stale."""
+    index_path = csv_path.with_name(csv_path.name + ROW_INDEX_SUFFIX)
+    st = csv_path.stat()
+    count = _row_index_count(index_path, st)
+    if count is not None:
+        return index_path, count
+    with _build_lock(index_path):
+        # Another read may have built it while this one waited
+        count = _row_index_count(index_path, st)
+        if count is None:
+            count = _build_row_index(csv_path, index_path)
+    return index_path, count
+
+
+def _row_offset(index_path: Path, row: int) -> int:
+    """Byte offset of data row `row` (0-based) — a single seek into the index."""
+    with open(index_path, "rb") as fh:
+        fh.seek(_ROW_INDEX_HEADER.size + row * 8)
+        return array("Q", fh.read(8))[0]
+
+
+def _row_offsets(index_path: Path, rows) -> list[int]:
+    """Byte offsets of several data rows, reading the index once."""
+    offsets = []
+    with open(index_path, "rb") as fh:
+        for row in rows:
+            fh.seek(_ROW_INDEX_HEADER.size + row * 8)
+            offsets.append(array("Q", fh.read(8))[0])
+    return offsets
+
+
+def _position_after(csv_path: Path, ordinal: int) -> int:
+    """Byte offset where the data row after `ordinal` starts (file size after the last)."""
+    index_path, count = _ensure_row_index(csv_path)
+    if ordinal + 1 < count:
+        return _row_offset(index_path, ordinal + 1)
+    return csv_path.stat().st_size
+
+
+def _iter_rows_at(fh, index_path: Path, ordinals):
+    """Yield (ordinal, end offset, row) for the given data rows, seeking via the row index."""
+    for ordinal, start in zip(ordinals, _row_offsets(index_path, ordinals)):
+        for end, row in _iter_csv_rows(fh, start):
+            yield ordinal, end, row
+            break
+
+
+# --- Match cache ---
+
+
+def _cached_matches(key: tuple) -> Optional[array]:
+    """Row ordinals recorded for a filter, marking them most recently used."""
+    with _match_cache_lock:
+        matches = _match_cache.get(key)
+        if matches is not None:
+            _match_cache.move_to_end(key)
+    return matches
+
+
+def _cache_matches(key: tuple, matches: array):
+    """Remember a filter's row ordinals, evicting the oldest entries past the byte budget."""
+    global _match_cache_bytes
+    size = matches.itemsize * len(matches)
+    if size > MATCH_CACHE_MAX_BYTES:
+        return
+    with _match_cache_lock:
+        old = _match_cache.pop(key, None)
+        if old is not None:
+            _match_cache_bytes -= old.itemsize * len(old)
+        _match_cache[key] = matches
+        _match_cache_bytes += size
+        while _match_cache_bytes > MATCH_CACHE_MAX_BYTES:
+            _, evicted = _match_cache.popitem(last=False)
+            _match_cache_bytes -= evicted.itemsize * len(evicted)
+
+
+# --- Trigram index ---
+#
+# Substring filters on URL columns are the most common read_crawl_data filter,
+# and on bulk link exports they mean scanning tens of millions of rows. The
+# trigram index maps every lowercase 3-character sequence in the Address,
+# Source and Destination columns to the sorted ordinals of the rows containing
+# it, so `contains` becomes a posting-list intersection and only the candidate
+# rows are read and checked.
+#
+# Layout: header (magic, CSV size, CSV mtime_ns, directory length), a JSON
+# directory {column: {trigram: [first posting, count]}}, then the posting lists
+# as native uint32 row ordinals. Postings are spilled to a temp file every
+# TRIGRAM_BUILD_ROWS rows and merged at the end, so memory stays bounded.
+
+_TRIGRAM_MAGIC = b"SFTRGM01"
+_TRIGRAM_HEADER = struct.Struct("=8sQqQ")
+
+
+def _trigrams(text: str) -> set:
+    """Lowercase 3-character sequences of a string."""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _build_trigram_index(csv_path: Path, index_path: Path, columns: list):
+    """Scan a CSV once and write the trigram index for `columns` (name, position) pairs."""
+    st = csv_path.stat()
+    _, data_start = _read_csv_header(csv_path)
+    spill_path = index_path.with_name(index_path.name + ".spill")
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    # column -> trigram -> [(spill offset, count)], one segment per block of rows
+    segments = {name: {} for name, _ in columns}
+    try:
+        with open(csv_path, "rb") as fh, open(spill_path, "w+b") as spill:
+            block = {name: {} for name, _ in columns}
+
+            def flush():
+                for name, postings in block.items():
+                    column_segments = segments[name]
+                    for gram, ordinals in postings.items():
+                        column_segments.setdefault(gram, []).append((spill.tell(), len(ordinals)))
+                        ordinals.tofile(spill)
+                    postings.clear()
+
+            for ordinal, (_, row) in enumerate(_iter_csv_rows(fh, data_start)):
+                for name, i in columns:
+                    if i < len(row):
+                        postings = block[name]
+                        for gram in _trigrams(row[i]):
+                            ordinals = postings.get(gram)
+                            if ordinals is None:
+                                ordinals = postings[gram] = array("I")
+                            ordinals.append(ordinal)
+                if ordinal % TRIGRAM_BUILD_ROWS == TRIGRAM_BUILD_ROWS - 1:
+                    flush()
+            flush()
+
+            # Blocks hold ascending ordinals, so concatenating a trigram's
+            # segments in order gives one sorted posting list
+            directory = {}
+            position = 0
+            for name, column_segments in segments.items():
+                directory[name] = {}
+                for gram in sorted(column_segments):
+                    count = sum(n for _, n in column_segments[gram])
+                    directory[name][gram] = [position, count]
+                    position += count
+            encoded = json.dumps(directory, separators=(",", ":")).encode()
+
+            with open(tmp_path, "wb") as out:
+                out.write(_TRIGRAM_HEADER.pack(_TRIGRAM_MAGIC, st.st_size, st.st_mtime_ns, len(encoded)))
+                out.write(encoded)
+                for name, grams in directory.items():
+                    for gram in grams:
+                        for offset, count in segments[name][gram]:
+                            spill.seek(offset)
+                            out.write(spill.read(count * 4))
+        os.replace(tmp_path, index_path)
+    finally:
+        spill_path.unlink(missing_ok=True)
+        tmp_path.unlink(missing_ok=True)
+
+
+@functools.lru_cache(maxsize=16)
+def _load_trigram_directory(index_path: Path, size: int, mtime_ns: int) -> Optional[tuple]:
+    """Return (directory, byte offset of the postings) if the index matches the CSV size/mtime."""
+    try:
+        with open(index_path, "rb") as fh:
+            magic, idx_size, idx_mtime_ns, length = _TRIGRAM_HEADER.unpack(fh.read(_TRIGRAM_HEADER.size))
+            if magic != _TRIGRAM_MAGIC or idx_size != size or idx_mtime_ns != mtime_ns:
+                return None
+            directory = json.loads(fh.read(length))
+    except (OSError, struct.error, ValueError):
+        return None
+    return directory, _TRIGRAM_HEADER.size + length
+
+
+def _trigram_index(csv_path: Path) -> tuple[Path, Optional[tuple]]:
+    """Return (index path, loaded directory or None if missing/stale)."""
+    index_path = csv_path.with_name(csv_path.name + TRIGRAM_INDEX_SUFFIX)
+    st = csv_path.stat()
+    return index_path, _load_trigram_directory(index_path, st.st_size, st.st_mtime_ns)
+
+
+def _ensure_trigram_index(csv_path: Path, header: list) -> bool:
+    """Build the trigram index for a CSV with URL columns unless a current one exists."""
+    columns = [(name, header.index(name)) for name in TRIGRAM_COLUMNS if name in header]
+    if not columns:
+        return False
+    index_path, loaded = _trigram_index(csv_path)
+    if loaded is None:
+        _build_trigram_index(csv_path, index_path, columns)
+        _load_trigram_directory.cache_clear()  # drop the cached miss
+    return True
+
+
+def _trigram_candidates(csv_path: Path, needles: dict) -> Optional[array]:
+    """Sorted ordinals of rows that may contain every needle, from the trigram index.
+
+    `needles` maps column -> substrings (lowercase). Returns None when the index
+    is missing or cannot narrow the search (no needle of 3+ characters).
+    """
+    index_path, loaded = _trigram_index(csv_path)
+    if loaded is None:
+        return None
+    directory, postings_start = loaded
+
+    lists = []
+    for column, substrings in needles.items():
+        grams = directory.get(column)
+        if grams is None:
+            continue
+        for gram in set().union(*map(_trigrams, substrings)):
+            entry = grams.get(gram)
+            if entry is None:
+                return array("I")  # a trigram no row contains — nothing can match
+            lists.append(entry)
+    if not lists:
+        return None
+
+    # Intersect from the shortest list. Long lists barely narrow the result and
+    # cost more to read than verifying the candidates, so stop at those.
+    lists.sort(key=lambda entry: entry[1])
+    with open(index_path, "rb") as fh:
+        candidates = None
+        for first, count in lists:
+            if candidates is not None and count > 16 * len(candidates) + 4096:
+                break
+            fh.seek(postings_start + first * 4)
+            ordinals = array("I")
+            ordinals.frombytes(fh.read(count * 4))
+            if candidates is None:
+                candidates = ordinals
+            else:
+                keep = set(candidates)
+                candidates = array("I", (o for o in ordinals if o in keep))
+            if not candidates:
+                break
+    return candidates
+
+
+def _required_substrings(ast: Optional[tuple], header: list) -> dict:
+    """Substrings every matching row must contain, per trigram-indexed column.
+
+    Only conjunctive `contains` and text `=` comparisons qualify; anything under
+    OR/NOT could match without the substring.
+    """
+    needles = {}
+    if ast is None:
+        return needles
+    if ast[0] == "and":
+        for node in ast[1]:
+            for column, values in _required_substrings(node, header).items():
+                needles.setdefault(column, []).extend(values)
+        return needles
+    if ast[0] != "cmp":
+        return needles
+    _, column, op, value = ast
+    if op == "contains" or (op == "=" and isinstance(value, str) and _parse_number(value) is None):
+        indices, err = _resolve_columns(header, column)
+        if not err and header[indices[0]] in TRIGRAM_COLUMNS:
+            needles.setdefault(header[indices[0]], []).append(value.lower())
+    return needles
+
+
+# --- Bitmap index ---
+#
+# Columns like Status Code or Indexability hold a handful of distinct values
+# but are filtered constantly. The bitmap index stores, per column and value,
+# the rows holding that value — as a sorted uint32 array when few rows do, as
+# a bitmap otherwise, whichever is smaller. A where clause over these columns
+# is then answered by combining Python ints as bitsets, without reading the CSV.
+#
+# Layout: header (magic, CSV size, CSV mtime_ns, row count, directory length),
+# a JSON directory {column: {value: [kind, offset, length]}} where kind is "a"
+# (uint32 array) or "b" (little-endian bitmap), then the posting data.
+
+_BITMAP_MAGIC = b"SFBMIX01"
+_BITMAP_HEADER = struct.Struct("=8sQqQQ")
+
+
+def _build_bitmap_index(csv_path: Path, index_path: Path, columns: list):
+    """Scan a CSV once and write the bitmap index for `columns` (name, position) pairs."""
+    st = csv_path.stat()
+    _, data_start = _read_csv_header(csv_path)
+    # One byte per row per column: the row's value code
+    codes = {name: bytearray() for name, _ in columns}
+    values = {name: {} for name, _ in columns}
+    active = list(columns)
+    n_rows = 0
+    with open(csv_path, "rb") as fh:
+        for _, row in _iter_csv_rows(fh, data_start):
+            for column in list(active):
+                name, i = column
+                value = row[i] if i < len(row) else ""
+                code = values[name].get(value)
+                if code is None:
+                    if len(values[name]) >= BITMAP_MAX_VALUES:
+                        active.remove(column)  # too many distinct values to be worth it
+                        del codes[name], values[name]
+                        continue
+                    code = values[name][value] = len(values[name])
+                codes[name].append(code)
+            n_rows += 1
+
+    directory = {}
+    chunks = []
+    position = 0
+    bitmap_size = (n_rows + 7) // 8
+    for name, column_values in values.items():
+        directory[name] = {}
+        for value, code in column_values.items():
+            # translate() turns the codes into an ASCII '1'/'0' mask for this value
+            mask = codes[name].translate(bytes(49 if c == code else 48 for c in range(256)))
+            if mask.count(b"1") * 4 <= bitmap_size:
+                data = array("I", (m.start() for m in re.finditer(b"1", mask))).tobytes()
+                kind = "a"
+            else:
+                data = int(mask[::-1], 2).to_bytes(bitmap_size, "little")
+                kind = "b"
+            directory[name][value] = [kind, position, len(data)]
+            chunks.append(data)
+            position += len(data)
+    encoded = json.dumps(directory, separators=(",", ":")).encode()
+
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, "wb") as out:
+        out.write(_BITMAP_HEADER.pack(_BITMAP_MAGIC, st.st_size, st.st_mtime_ns, n_rows, len(encoded)))
+        out.write(encoded)
+        for data in chunks:
+            out.write(data)
+    os.replace(tmp_path, index_path)
+
+
+@functools.lru_cache(maxsize=16)
+def _load_bitmap_directory(index_path: Path, size: int, mtime_ns: int) -> Optional[tuple]:
+    """Return (directory, byte offset of the data, row count) if the index matches the CSV."""
+    try:
+        with open(index_path, "rb") as fh:
+            magic, idx_size, idx_mtime_ns, n_rows, length = _BITMAP_HEADER.unpack(
+                fh.read(_BITMAP_HEADER.size)
+            )
+            if magic != _BITMAP_MAGIC or idx_size != size or idx_mtime_ns != mtime_ns:
+                return None
+            directory = json.loads(fh.read(length))
+    except (OSError, struct.error, ValueError):
+        return None
+    return directory, _BITMAP_HEADER.size + length, n_rows
+
+
+def _bitmap_index(csv_path: Path) -> tuple[Path, Optional[tuple]]:
+    """Return (index path, loaded directory or None if missing/stale)."""
+    index_path = csv_path.with_name(csv_path.name + BITMAP_INDEX_SUFFIX)
+    st = csv_path.stat()
+    return index_path, _load_bitmap_directory(index_path, st.st_size, st.st_mtime_ns)
+
+
+def _ensure_bitmap_index(csv_path: Path, header: list) -> bool:
+    """Build the bitmap index for a CSV with low-cardinality columns unless a current one exists."""
+    columns = [(name, header.index(name)) for name in BITMAP_COLUMNS if name in header]
+    if not columns:
+        return False
+    index_path, loaded = _bitmap_index(csv_path)
+    if loaded is None:
+        _build_bitmap_index(csv_path, index_path, columns)
+        _load_bitmap_directory.cache_clear()  # drop the cached miss
+    return True
+
+
+def _bits_to_ordinals(bits: int) -> array:
+    """Row ordinals of the set bits of a bitset, ascending."""
+    return array("I", (m.start() for m in re.finditer("1", format(bits, "b")[::-1])))
+
+
+def _bitmap_matches(csv_path: Path, ast: tuple, header: list) -> Optional[tuple]:
+    """Evaluate a where AST from the bitmap index.
+
+    Returns (bits, exact): a bitset of row ordinals and whether it is exactly
+    the matching rows (True) or a superset still to be verified (False).
+    None when the index is missing or covers none of the filtered columns.
+    """
+    index_path, loaded = _bitmap_index(csv_path)
+    if loaded is None:
+        return None
+    directory, data_start, n_rows = loaded
+    all_rows = (1 << n_rows) - 1
+
+    def load(fh, entry) -> int:
+        kind, offset, length = entry
+        fh.seek(data_start + offset)
+        data = fh.read(length)
+        if kind == "b":
+            return int.from_bytes(data, "little")
+        ordinals = array("I")
+        ordinals.frombytes(data)
+        if not ordinals:
+            return 0
+        mask = bytearray(b"0") * n_rows
+        for ordinal in ordinals:
+            mask[ordinal] = 49
+        return int(mask[::-1], 2)
+
+    def evaluate(fh, node) -> Optional[tuple]:
+        kind = node[0]
+        if kind == "cmp":
+            indices, err = _resolve_columns(header, node[1])
+            name = header[indices[0]] if not err else None
+            if name not in directory:
+                return None
+            # A comparison only looks at one cell, so test it against each
+            # distinct value and union the rows holding the values that pass
+            predicate = _compile_predicate(node, header)
+            probe = [""] * len(header)
+            bits = 0
+            for value, entry in directory[name].items():
+                probe[indices[0]] = value
+                if predicate(probe):
+                    bits |= load(fh, entry)
+            return bits, True
+        if kind == "not":
+            inner = evaluate(fh, node[1])
+            if inner is None or not inner[1]:
+                return None
+            return all_rows & ~inner[0], True
+        results = [evaluate(fh, child) for child in node[1]]
+        if kind == "or":
+            if any(r is None for r in results):
+                return None
+            bits = 0
+            for r in results:
+                bits |= r[0]
+            return bits, all(r[1] for r in results)
+        known = [r for r in results if r is not None]
+        if not known:
+            return None
+        bits = all_rows
+        for r in known:
+            bits &= r[0]
+        return bits, len(known) == len(results) and all(r[1] for r in known)
+
+    with open(index_path, "rb") as fh:
+        return evaluate(fh, ast)
+
+
+def _filter_plan(ast: Optional[tuple], filter_column: Optional[str], needle: Optional[str]) -> tuple:
+    """One where AST for read_crawl_data's where clause plus its filter_column/filter_value."""
+    nodes = [ast] if ast is not None else []
+    if needle is not None:
+        nodes.append(("cmp", filter_column, "contains", needle))
+    return ("and", nodes)
+
+
+def _indexed_matches(
+    csv_path: Path, header: list, ast: Optional[tuple],
+    filter_column: Optional[str], needle: Optional[str],
+) -> Optional[tuple]:
+    """Use the bitmap and trigram indexes to narrow a filtered read.
+
+    Returns (ordinals, exact) like _bitmap_matches, or None to scan the file.
+    """
+    if needle is not None and filter_column not in header:
+        return None
+    plan = _filter_plan(ast, filter_column, needle)
+
+    bitmap = _bitmap_matches(csv_path, plan, header)
+    if bitmap is not None and bitmap[1]:
+        return _bits_to_ordinals(bitmap[0]), True
+
+    needles = _required_substrings(plan, header)
+    candidates = _trigram_candidates(csv_path, needles) if needles else None
+    if bitmap is not None:
+        if candidates is None:
+            candidates = _bits_to_ordinals(bitmap[0])
+        else:
+            bits = bitmap[0]
+            candidates = array("I", (o for o in candidates if bits >> o & 1))
+    if candidates is None:
+        return None
+    return candidates, False
+
+
+def _build_search_indexes(export_dir: Path, manifest: dict) -> int:
+    """Build row, trigram and bitmap indexes for an export's CSVs. Returns the files indexed."""
+    indexed = 0
+    for rel_path, entry in manifest["files"].items():
+        path = export_dir / rel_path
+        has_urls = _ensure_trigram_index(path, entry["header"])
+        if _ensure_bitmap_index(path, entry["header"]) or has_urls:
+            _ensure_row_index(path)
+            indexed += 1
+    return indexed
+
+# --- Columnar cache ---
+#
+# Parsing CSV text dominates every read of a large export. The columnar cache
+# transcodes a CSV into row groups of COLUMNAR_GROUP_ROWS rows, each column of
+# a group stored as one of:
+#   "i"  int64 array      (only if str(value) gives back the exact cell text)
+#   "f"  float64 array    (only if repr(value) gives back the exact cell text)
+#   "d"  dictionary codes (uint8/16/32) plus the distinct values
+#   "s"  plain UTF-8 strings with uint64 offsets, when most values are distinct
+# Empty cells in numeric columns are flagged in a one-byte-per-row null mask.
+# The file is mmap'ed and buffers are read through memoryview casts, so a
+# filter decodes only the cells of the columns it uses.
+#
+# Layout: header (magic, CSV size, CSV mtime_ns, row count, directory offset,
+# directory length), 8-byte aligned column buffers, then a JSON directory
+# {columns, group_rows, groups: [{n, c: [per-column buffer offsets]}]}.
+
+_COLUMNAR_MAGIC = b"SFCOLS01"
+_COLUMNAR_HEADER = struct.Struct("=8sQqQQQ")
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+def _pack_strings(strings) -> tuple[bytes, bytes]:
+    """Encode strings as (uint64 offsets, UTF-8 blob)."""
+    encoded = [s.encode("utf-8") for s in strings]
+    return array("Q", accumulate(map(len, encoded), initial=0)).tobytes(), b"".join(encoded)
+
+
+def _encode_column(cells: list, write) -> dict:
+    """Encode one column of a row group, writing its buffers via `write(data) -> offset`."""
+    empty = [not c for c in cells]
+    nulls = bytes(empty) if any(empty) else None
+    for kind, typecode, convert, render in (("i", "q", int, str), ("f", "d", float, repr)):
+        try:
+            values = [convert(c) if c else 0 for c in cells]
+        except ValueError:
+            continue
+        if not all(not c or render(v) == c for c, v in zip(cells, values)):
+            continue
+        if kind == "i" and not all(_INT64_MIN <= v <= _INT64_MAX for v in values):
+            continue
+        desc = {"k": kind, "o": write(array(typecode, values).tobytes())}
+        if nulls:
+            desc["z"] = write(nulls)
+        return desc
+
+    distinct = dict.fromkeys(cells)
+    if len(distinct) <= len(cells) // 2:
+        codes = {value: code for code, value in enumerate(distinct)}
+        typecode = "B" if len(codes) <= 1 << 8 else "H" if len(codes) <= 1 << 16 else "I"
+        offsets, blob = _pack_strings(codes)
+        return {
+            "k": "d", "t": typecode, "nv": len(codes),
+            "o": write(array(typecode, map(codes.__getitem__, cells)).tobytes()),
+            "vo": write(offsets), "vb": write(blob),
+        }
+    offsets, blob = _pack_strings(cells)
+    return {"k": "s", "o": write(offsets), "b": write(blob)}
+
+
+def _build_columnar(csv_path: Path, cols_path: Path):
+    """Transcode a CSV into its columnar cache file."""
+    st = csv_path.stat()
+    header, data_start = _read_csv_header(csv_path)
+    groups = []
+    n_rows = 0
+    tmp_path = cols_path.with_name(cols_path.name + ".tmp")
+    with open(csv_path, "rb") as fh, open(tmp_path, "wb") as out:
+        out.write(bytes(_COLUMNAR_HEADER.size))
+
+        def write(data: bytes) -> int:
+            out.write(bytes(-out.tell() % 8))  # keep buffers aligned for casting
+            offset = out.tell()
+            out.write(data)
+            return offset
+
+        def flush(block: list):
+            columns = [[row[j] if j < len(row) else "" for row in block] for j in range(len(header))]
+            groups.append({"n": len(block), "c": [_encode_column(cells, write) for cells in columns]})
+
+        block = []
+        for _, row in _iter_csv_rows(fh, data_start):
+            block.append(row)
+            if len(block) == COLUMNAR_GROUP_ROWS:
+                flush(block)
+                n_rows += len(block)
+                block = []
+        if block:
+            flush(block)
+            n_rows += len(block)
+
+        directory = {"columns": header, "group_rows": COLUMNAR_GROUP_ROWS, "groups": groups}
+        encoded = json.dumps(directory, separators=(",", ":")).encode()
+        directory_offset = write(encoded)
+        out.seek(0)
+        out.write(_COLUMNAR_HEADER.pack(
+            _COLUMNAR_MAGIC, st.st_size, st.st_mtime_ns, n_rows, directory_offset, len(encoded)
+        ))
+    os.replace(tmp_path, cols_path)
+
+
+def _open_columnar(csv_path: Path) -> Optional[dict]:
+    """Map a CSV's columnar cache, or None if missing or stale. Close with _close_columnar."""
+    cols_path = csv_path.with_name(csv_path.name + COLUMNAR_SUFFIX)
+    try:
+        st = csv_path.stat()
+        fh = open(cols_path, "rb")
+    except OSError:
+        return None
+    try:
+        magic, size, mtime_ns, n_rows, directory_offset, length = _COLUMNAR_HEADER.unpack(
+            fh.read(_COLUMNAR_HEADER.size)
+        )
+        if magic != _COLUMNAR_MAGIC or size != st.st_size or mtime_ns != st.st_mtime_ns:
+            fh.close()
+            return None
+        mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        directory = json.loads(mm[directory_offset:directory_offset + length])
+    except (OSError, struct.error, ValueError):
+        fh.close()
+        return None
+    return {
+        "fh": fh,
+        "mm": mm,
+        "view": memoryview(mm),
+        "rows": n_rows,
+        "columns": directory["columns"],
+        "group_rows": directory["group_rows"],
+        "groups": directory["groups"],
+        "chunks": {},
+    }
+
+
+def _close_columnar(cols: dict):
+    """Release a mapped columnar cache."""
+    cols["chunks"].clear()  # drop the buffer views before unmapping
+    cols["view"].release()
+    cols["mm"].close()
+    cols["fh"].close()
+
+
+def _columnar_chunk(cols: dict, group: int, column: int) -> tuple:
+    """(kind, values, extra) views for one column of one row group, decoded once."""
+    key = (group, column)
+    chunk = cols["chunks"].get(key)
+    if chunk is not None:
+        return chunk
+    desc = cols["groups"][group]["c"][column]
+    n = cols["groups"][group]["n"]
+    view = cols["view"]
+    kind = desc["k"]
+    if kind in ("i", "f"):
+        values = view[desc["o"]:desc["o"] + n * 8].cast("q" if kind == "i" else "d")
+        nulls = view[desc["z"]:desc["z"] + n] if "z" in desc else None
+        chunk = (kind, values, nulls)
+    elif kind == "d":
+        itemsize = array(desc["t"]).itemsize
+        codes = view[desc["o"]:desc["o"] + n * itemsize].cast(desc["t"])
+        offsets = view[desc["vo"]:desc["vo"] + (desc["nv"] + 1) * 8].cast("Q")
+        base = desc["vb"]
+        values = [str(view[base + offsets[k]:base + offsets[k + 1]], "utf-8") for k in range(desc["nv"])]
+        chunk = (kind, codes, values)
+    else:
+        chunk = (kind, view[desc["o"]:desc["o"] + (n + 1) * 8].cast("Q"), desc["b"])
+    cols["chunks"][key] = chunk
+    return chunk
+
+
+def _columnar_cell(cols: dict, column: int, ordinal: int) -> str:
+    """The original CSV text of one cell."""
+    group, i = divmod(ordinal, cols["group_rows"])
+    kind, values, extra = _columnar_chunk(cols, group, column)
+    if kind == "d":
+        return extra[values[i]]
+    if kind == "s":
+        return str(cols["view"][extra + values[i]:extra + values[i + 1]], "utf-8")
+    if extra is not None and extra[i]:
+        return ""
+    return str(values[i]) if kind == "i" else repr(values[i])
+
+
+def _columnar_values(cols: dict, group: int, column: int) -> list:
+    """All cells of one column in one row group, as CSV text."""
+    kind, values, extra = _columnar_chunk(cols, group, column)
+    if kind == "d":
+        return [extra[code] for code in values]
+    if kind == "s":
+        blob = cols["mm"][extra + values[0]:extra + values[len(values) - 1]]
+        base = values[0]
+        return [
+            blob[start - base:end - base].decode("utf-8")
+            for start, end in zip(values[:-1], values[1:])
+        ]
+    render = str if kind == "i" else repr
+    if extra is None:
+        return [render(v) for v in values]
+    return ["" if null else render(v) for v, null in zip(values, extra)]
+
+
+def _iter_columnar_probes(cols: dict, width: int, tested):
+    """Yield (ordinal, None, probe) over every row, where probe is a row of
+    `width` cells with only the `tested` columns filled in (scan order)."""
+    probe = [""] * width
+    ordinal = 0
+    for group, info in enumerate(cols["groups"]):
+        decoded = [(j, _columnar_values(cols, group, j)) for j in tested]
+        for i in range(info["n"]):
+            for j, values in decoded:
+                probe[j] = values[i]
+            yield ordinal, None, probe
+            ordinal += 1
+
+
+def _columnar_row(cols: dict, ordinal: int) -> list:
+    """A full row, as csv.reader would have parsed it (padded to the header width)."""
+    return [_columnar_cell(cols, j, ordinal) for j in range(len(cols["columns"]))]
+
+
+def _fetch_rows(csv_path: Path, ordinals) -> list:
+    """Full rows at the given ordinals, from the columnar cache or via the row index."""
+    cols = _open_columnar(csv_path)
+    if cols is not None:
+        try:
+            return [_columnar_row(cols, ordinal) for ordinal in ordinals]
+        finally:
+            _close_columnar(cols)
+    index_path, _ = _ensure_row_index(csv_path)
+    with open(csv_path, "rb") as fh:
+        return [row for _, _, row in _iter_rows_at(fh, index_path, ordinals)]
+
+
+def _ensure_columnar(csv_path: Path):
+    """Build a CSV's columnar cache unless a current one exists."""
+    cols = _open_columnar(csv_path)
+    if cols is not None:
+        _close_columnar(cols)
+        return
+    _build_columnar(csv_path, csv_path.with_name(csv_path.name + COLUMNAR_SUFFIX))
+
+
+def _build_columnar_cache(export_dir: Path, manifest: dict) -> int:
+    """Transcode an export's CSVs (and index their rows). Returns the files transcoded."""
+    for rel_path in manifest["files"]:
+        path = export_dir / rel_path
+        _ensure_columnar(path)
+        _ensure_row_index(path)  # cursors still carry CSV byte offsets
+    return len(manifest["files"])
+
+
+# --- Vectorized filters ---
+#
+# With NumPy installed, filters over a columnar cache run as boolean masks over
+# whole row groups instead of a Python call per row. Numeric comparisons on
+# int64/float64 columns compare the mapped buffers directly; every other
+# comparison is tested once per distinct value (dictionary entries, or the
+# unique numbers) and broadcast back to the rows, so results are identical to
+# the per-row predicate. Plain string columns still test each cell.
+
+_NUMPY_COMPARE = {">": "greater", ">=": "greater_equal", "<": "less", "<=": "less_equal"}
+
+
+def _numpy_mask(cols: dict, group: int, ast: tuple, header: list):
+    """Boolean mask of the rows of one row group that match a where AST."""
+    n = cols["groups"][group]["n"]
+    kind = ast[0]
+    if kind == "and":
+        mask = np.ones(n, dtype=bool)
+        for node in ast[1]:
+            mask &= _numpy_mask(cols, group, node, header)
+        return mask
+    if kind == "or":
+        mask = np.zeros(n, dtype=bool)
+        for node in ast[1]:
+            mask |= _numpy_mask(cols, group, node, header)
+        return mask
+    if kind == "not":
+        return ~_numpy_mask(cols, group, ast[1], header)
+
+    _, column, op, value = ast
+    j = _resolve_columns(header, column)[0][0]
+    predicate = _compile_predicate(ast, header)
+    probe = [""] * len(header)
+
+    def test(text: str) -> bool:
+        probe[j] = text
+        return predicate(probe)
+
+    chunk_kind, values, extra = _columnar_chunk(cols, group, j)
+    if chunk_kind in ("i", "f"):
+        numbers = np.frombuffer(values, dtype=np.int64 if chunk_kind == "i" else np.float64)
+        if op in _NUMPY_COMPARE:
+            mask = getattr(np, _NUMPY_COMPARE[op])(numbers, _parse_number(value))
+            if chunk_kind == "f":
+                mask &= np.isfinite(numbers)  # "nan"/"inf" cells aren't numbers to the parser
+        else:
+            render = str if chunk_kind == "i" else repr
+            uniques = np.unique(numbers)
+            passing = np.fromiter((test(render(v)) for v in uniques.tolist()), dtype=bool, count=len(uniques))
+            chosen = uniques[passing]
+            mask = np.isin(numbers, chosen)
+            if chunk_kind == "f" and np.isnan(chosen).any():
+                mask |= np.isnan(numbers)  # isin never matches NaN
+        if extra is not None:
+            mask[np.frombuffer(extra, dtype=np.bool_)] = test("")
+        return mask
+    if chunk_kind == "d":
+        table = np.fromiter((test(v) for v in extra), dtype=bool, count=len(extra))
+        return table[np.frombuffer(values, dtype=values.format)]
+    return np.fromiter((test(v) for v in _columnar_values(cols, group, j)), dtype=bool, count=n)
+
+
+def _numpy_matches(cols: dict, header: list, ast: tuple) -> array:
+    """Ordinals of all rows matching a where AST, evaluated a row group at a time."""
+    found = array("I")
+    base = 0
+    for group, info in enumerate(cols["groups"]):
+        ordinals = np.flatnonzero(_numpy_mask(cols, group, ast, header)) + base
+        found.frombytes(ordinals.astype(np.uint32).tobytes())
+        base += info["n"]
+    return found
+
+
+def _iter_matching_rows(csv_path: Path, header: list, data_start: int, ast: Optional[tuple], columns):
+    """Yield (ordinal, row) for every row matching a where AST (None matches all).
+
+    The fastest available source is used: NumPy masks or per-row predicates
+    over the columnar cache (rows then only hold `columns` and the filtered
+    ones; other cells are ''), else a CSV scan. The yielded row may be reused
+    for the next row, so copy what you keep.
+    """
+    cols = _open_columnar(csv_path)
+    if cols is None:
+        predicate = _compile_predicate(ast, header) if ast is not None else None
+        with open(csv_path, "rb") as fh:
+            for ordinal, (_, row) in enumerate(_iter_csv_rows(fh, data_start)):
+                if predicate is None or predicate(row):
+                    yield ordinal, row
+        return
+
+    try:
+        if np is not None:
+            probe = [""] * len(header)
+            base = 0
+            for group, info in enumerate(cols["groups"]):
+                if ast is None:
+                    selected = range(info["n"])
+                else:
+                    selected = np.flatnonzero(_numpy_mask(cols, group, ast, header)).tolist()
+                decoded = [(j, _columnar_values(cols, group, j)) for j in columns]
+                for i in selected:
+                    for j, values in decoded:
+                        probe[j] = values[i]
+                    yield base + i, probe
+                base += info["n"]
+        else:
+            predicate = _compile_predicate(ast, header) if ast is not None else None
+            tested = set(columns) | _where_columns(ast, header)
+            for ordinal, _, probe in _iter_columnar_probes(cols, len(header), tested):
+                if predicate is None or predicate(probe):
+                    yield ordinal, probe
+    finally:
+        _close_columnar(cols)
+
+
+# --- Sort index ---
+#
+# read_crawl_data(sort_by=...) pages through a file in the order of one
+# column. The sorted permutation (row ordinals in sort order) is cached in a
+# sidecar per column and direction, so every page after the first is a seek
+# into it. Files too large to sort in memory go through an external merge
+# sort: sorted runs of SORT_RUN_ROWS keys are spilled next to the CSV and
+# merged with heapq.merge.
+#
+# Order: numbers (numerically), then text (case-insensitive), then empty
+# cells — empty cells stay last when descending. Ties keep file order.
+#
+# Layout: header (magic, CSV size, CSV mtime_ns, row count) followed by one
+# native uint32 row ordinal per row.
+
+_SORT_MAGIC = b"SFSORT01"
+_SORT_HEADER = struct.Struct("=8sQqQ")
+
+
+def _sort_key(cell: str, ordinal: int, descending: bool) -> tuple:
+    """Comparable key: (rank, value, tiebreak). Descending sorts use reverse=True,
+    so ranks and the tiebreak are flipped to keep empties last and ties in order."""
+    n = _parse_number(cell)
+    if n is not None:
+        return (2 if descending else 0, n, -ordinal if descending else ordinal)
+    if cell:
+        return (1, cell.lower(), -ordinal if descending else ordinal)
+    return (0 if descending else 2, "", -ordinal if descending else ordinal)
+
+
+def _spill_run(keys: list, path: Path):
+    """Write one sorted run as a stream of pickled batches."""
+    with open(path, "wb") as out:
+        for i in range(0, len(keys), 10000):
+            pickle.dump(keys[i:i + 10000], out, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_run(path: Path):
+    """Stream the keys of a run written by _spill_run."""
+    with open(path, "rb") as fh:
+        while True:
+            try:
+                yield from pickle.load(fh)
+            except EOFError:
+                return
+
+
+def _build_sort_index(csv_path: Path, sort_path: Path, header: list, data_start: int, column: int, descending: bool):
+    """Sort a CSV's rows by one column and write the permutation."""
+    st = csv_path.stat()
+    runs = []
+    keys = []
+    try:
+        for ordinal, row in _iter_matching_rows(csv_path, header, data_start, None, {column}):
+            keys.append(_sort_key(row[column] if column < len(row) else "", ordinal, descending))
+            if len(keys) >= SORT_RUN_ROWS:
+                keys.sort(reverse=descending)
+                runs.append(sort_path.with_name(f"{sort_path.name}.run{len(runs)}"))
+                _spill_run(keys, runs[-1])
+                keys = []
+        keys.sort(reverse=descending)
+        if runs:
+            merged = heapq.merge(*map(_read_run, runs), iter(keys), reverse=descending)
+        else:
+            merged = iter(keys)
+
+        tmp_path = sort_path.with_name(sort_path.name + ".tmp")
+        count = 0
+        with open(tmp_path, "wb") as out:
+            out.write(bytes(_SORT_HEADER.size))
+            batch = array("I")
+            for key in merged:
+                batch.append(-key[2] if descending else key[2])
+                if len(batch) >= 65536:
+                    batch.tofile(out)
+                    count += len(batch)
+                    del batch[:]
+            batch.tofile(out)
+            count += len(batch)
+            out.seek(0)
+            out.write(_SORT_HEADER.pack(_SORT_MAGIC, st.st_size, st.st_mtime_ns, count))
+        os.replace(tmp_path, sort_path)
+    finally:
+        for run in runs:
+            run.unlink(missing_ok=True)
+
+
+def _ensure_sort_index(csv_path: Path, header: list, data_start: int, column: int, descending: bool) -> tuple[Path, int]:
+    """Return (permutation path, row count), sorting the file if missing or stale."""
+    digest = hashlib.sha256(header[column].encode()).hexdigest()[:12]
+    direction = "desc" if descending else "asc"
+    sort_path = csv_path.with_name(f"{csv_path.name}{SORT_INDEX_SUFFIX}-{digest}-{direction}")
+    st = csv_path.stat()
+    count = _sort_index_count(sort_path, st)
+    if count is not None:
+        return sort_path, count
+    with _build_lock(sort_path):
+        # Another read may have built it while this one waited
+        count = _sort_index_count(sort_path, st)
+        if count is None:
+            _build_sort_index(csv_path, sort_path, header, data_start, column, descending)
+            count = _sort_index_count(sort_path, st)
+    return sort_path, count
+
+
+def _sort_index_count(sort_path: Path, st: os.stat_result) -> Optional[int]:
+    """Row count of a permutation built from the CSV as it is now, else None."""
+    try:
+        with open(sort_path, "rb") as fh:
+            magic, size, mtime_ns, count = _SORT_HEADER.unpack(fh.read(_SORT_HEADER.size))
+    except (OSError, struct.error):
+        return None
+    if magic == _SORT_MAGIC and size == st.st_size and mtime_ns == st.st_mtime_ns:
+        return count
+    return None
+
+
+def _sorted_ordinals(sort_path: Path, start: int = 0, count: Optional[int] = None) -> array:
+    """Row ordinals at positions [start, start + count) of a sorted permutation."""
+    ordinals = array("I")
+    with open(sort_path, "rb") as fh:
+        fh.seek(_SORT_HEADER.size + start * 4)
+        ordinals.frombytes(fh.read(-1 if count is None else count * 4))
+    return ordinals
+
+
+def _sorted_matches(sort_path: Path, mask: array, wanted: int) -> array:
+    """The first `wanted` ordinals in sort order whose mask byte is set.
+
+    Reads the permutation SORT_READ_ROWS entries at a time and stops as soon
+    as enough matches are collected.
+    """
+    found = array("I")
+    mask_view = np.frombuffer(mask, dtype=np.uint8) if np is not None and len(mask) else None
+    start = 0
+    while len(found) < wanted:
+        chunk = _sorted_ordinals(sort_path, start, SORT_READ_ROWS)
+        if not chunk:
+            break
+        if mask_view is not None:
+            ordinals = np.frombuffer(chunk, dtype=np.uint32)
+            found.frombytes(ordinals[mask_view[ordinals] != 0].tobytes())
+        else:
+            found.extend(ordinal for ordinal in chunk if mask[ordinal])
+        start += len(chunk)
+    del found[wanted:]
+    return found
+
+
+# --- Aggregation ---
+#
+# aggregate_crawl_data streams matching rows once, keeping one accumulator per
+# group: memory grows with the number of groups, never with the file. Over a
+# columnar cache with NumPy installed, each row group is reduced at once
+# instead: group keys are worked out per distinct cell and every row carries
+# only a code, then counts, sums, minima and maxima are taken per code
+# straight from the mapped numeric buffers.
+
+_AGG_GROUP_RE = re.compile(r"(directory|bucket)\s*\(\s*(.+?)\s*(?:,\s*([^,()]*?)\s*)?\)", re.IGNORECASE)
+_AGG_METRIC_RE = re.compile(r"(count|sum|min|max|mean|avg)\s*\(\s*(.+?)\s*\)", re.IGNORECASE)
+
+
+def _split_top_level(text: str) -> list:
+    """Split on commas outside parentheses."""
+    parts, current, depth = [], [], 0
+    for ch in text:
+        if ch == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        depth += (ch == "(") - (ch == ")")
+        current.append(ch)
+    parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+def _url_directory(url: str, depth: int) -> str:
+    """The first `depth` directories of a URL's path, e.g. '/blog/' for depth 1."""
+    directories = urlparse(url).path.split("/")[1:-1]
+    return "/" + "".join(f"{d}/" for d in directories[:depth])
+
+
+def _parse_group_by(text: Optional[str], header: list) -> tuple:
+    """Parse group_by into [(label, position, kind, arg)]. Returns (groups, error)."""
+    groups = []
+    for part in _split_top_level(text or ""):
+        m = _AGG_GROUP_RE.fullmatch(part)
+        kind, column, arg = (m.group(1).lower(), m.group(2), m.group(3)) if m else ("column", part, None)
+        indices, err = _resolve_columns(header, column)
+        if err:
+            return None, err
+        j = indices[0]
+        if kind == "directory":
+            if arg and not arg.isdigit():
+                return None, f"ERROR: directory() depth must be a whole number, got {arg!r}."
+            arg = int(arg) if arg else 1
+            label = f"directory({header[j]})" if arg == 1 else f"directory({header[j]}, {arg})"
+        elif kind == "bucket":
+            width = _parse_number(arg or "")
+            if not width or width <= 0:
+                return None, "ERROR: bucket() needs a positive width, e.g. bucket(Word Count, 500)."
+            arg = width
+            label = f"bucket({header[j]}, {arg:g})"
+        else:
+            label = header[j]
+        groups.append((label, j, kind, arg))
+    return groups, None
+
+
+def _parse_metrics(text: Optional[str], header: list) -> tuple:
+    """Parse metrics into [(label, function, position or None)]. Returns (metrics, error)."""
+    metrics = []
+    for part in _split_top_level(text or "count"):
+        if part.lower() == "count":
+            metrics.append(("count", "count", None))
+            continue
+        m = _AGG_METRIC_RE.fullmatch(part)
+        if not m:
+            return None, (
+                f"ERROR: Unknown metric {part!r}. "
+                f"Use count, count(col), sum(col), min(col), max(col) or mean(col)."
+            )
+        func = m.group(1).lower().replace("avg", "mean")
+        indices, err = _resolve_columns(header, m.group(2))
+        if err:
+            return None, err
+        metrics.append((f"{func}({header[indices[0]]})", func, indices[0]))
+    return metrics, None
+
+
+def _group_value(cell: str, kind: str, arg):
+    """The value of one group_by expression for a cell."""
+    if kind == "directory":
+        return _url_directory(cell, arg)
+    if kind == "bucket":
+        n = _parse_number(cell)
+        return None if n is None else math.floor(n / arg) * arg
+    return cell
+
+
+def _group_key(row: list, groups: list) -> tuple:
+    """The group a row falls in, one value per group_by expression."""
+    width = len(row)
+    return tuple(_group_value(row[j] if j < width else "", kind, arg) for _, j, kind, arg in groups)
+
+
+def _format_metric(value) -> str:
+    """Render an aggregate: whole numbers without decimals, others to 4 places."""
+    if value is None:
+        return ""
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return f"{value:.4f}".rstrip("0").rstrip(".")
+
+
+def _aggregate_rows(csv_path: Path, header: list, data_start: int, ast: Optional[tuple],
+                    groups: list, metric_specs: list) -> tuple:
+    """Aggregate the rows matching a where AST. Returns (matched, accumulators).
+
+    Accumulators map each group key to [rows, then per metric [n, total, min, max]].
+    """
+    accumulators = {}
+    matched = 0
+    needed = {j for _, j, _, _ in groups} | {j for _, _, j in metric_specs if j is not None}
+    for _, row in _iter_matching_rows(csv_path, header, data_start, ast, needed):
+        matched += 1
+        key = _group_key(row, groups)
+        acc = accumulators.get(key)
+        if acc is None:
+            acc = accumulators[key] = [0] + [[0, 0.0, None, None] for _ in metric_specs]
+        acc[0] += 1
+        width = len(row)
+        for state, (_, func, j) in zip(acc[1:], metric_specs):
+            if j is None:
+                continue
+            cell = row[j] if j < width else ""
+            if func == "count":
+                state[0] += cell != ""
+                continue
+            n = _parse_number(cell)
+            if n is None:
+                continue
+            state[0] += 1
+            state[1] += n
+            if state[2] is None or n < state[2]:
+                state[2] = n
+            if state[3] is None or n > state[3]:
+                state[3] = n
+    return matched, accumulators
+
+
+# The helpers below take the row group's selected row positions (None for
+# all rows) and return arrays over just those rows.
+
+def _columnar_codes(cols: dict, group: int, column: int, selected) -> tuple:
+    """(codes, texts): for one column of one row group, each row's index into
+    the distinct cell texts."""
+    kind, values, extra = _columnar_chunk(cols, group, column)
+    if kind == "d":
+        codes = np.frombuffer(values, dtype=values.format)
+        return (codes if selected is None else codes[selected]).astype(np.intp), extra
+    if kind == "s":
+        cells = _columnar_values(cols, group, column)
+        if selected is not None:
+            cells = [cells[i] for i in selected.tolist()]
+        texts = {}
+        codes = np.fromiter((texts.setdefault(c, len(texts)) for c in cells), dtype=np.intp, count=len(cells))
+        return codes, list(texts)
+    numbers = np.frombuffer(values, dtype=np.int64 if kind == "i" else np.float64)
+    if selected is not None:
+        numbers = numbers[selected]
+    uniques, codes = np.unique(numbers, return_inverse=True)
+    codes = codes.reshape(-1)
+    render = str if kind == "i" else repr
+    texts = [render(v) for v in uniques.tolist()]
+    if extra is not None:
+        nulls = np.frombuffer(extra, dtype=np.bool_)
+        codes[nulls if selected is None else nulls[selected]] = len(texts)
+        texts.append("")
+    return codes, texts
+
+
+def _columnar_numbers(cols: dict, group: int, column: int, selected) -> tuple:
+    """(numbers, valid): one column of one row group as float64, and which
+    cells _parse_number would accept."""
+    kind, values, extra = _columnar_chunk(cols, group, column)
+    if kind in ("i", "f"):
+        numbers = np.frombuffer(values, dtype=np.int64 if kind == "i" else np.float64)
+        numbers = (numbers if selected is None else numbers[selected]).astype(np.float64)
+        valid = np.isfinite(numbers)  # "nan"/"inf" cells aren't numbers to the parser
+        if extra is not None:
+            nulls = np.frombuffer(extra, dtype=np.bool_)
+            valid &= ~(nulls if selected is None else nulls[selected])
+        return numbers, valid
+    codes, texts = _columnar_codes(cols, group, column, selected)
+    parsed = [_parse_number(text) for text in texts]
+    table = np.array([math.nan if n is None else n for n in parsed], dtype=np.float64)
+    parses = np.array([n is not None for n in parsed], dtype=bool)
+    return table[codes], parses[codes]
+
+
+def _columnar_present(cols: dict, group: int, column: int, selected):
+    """Which cells of one column of one row group are non-empty."""
+    kind, values, extra = _columnar_chunk(cols, group, column)
+    if kind in ("i", "f"):
+        if extra is None:
+            return np.ones(len(values) if selected is None else len(selected), dtype=bool)
+        present = ~np.frombuffer(extra, dtype=np.bool_)
+    elif kind == "s":
+        present = np.diff(np.frombuffer(values, dtype=np.uint64)) > 0
+    else:
+        table = np.array([text != "" for text in extra], dtype=bool)
+        present = table[np.frombuffer(values, dtype=values.format)]
+    return present if selected is None else present[selected]
+
+
+def _numpy_aggregate(cols: dict, header: list, ast: Optional[tuple],
+                     groups: list, metric_specs: list) -> tuple:
+    """_aggregate_rows over a columnar cache, a row group at a time with NumPy."""
+    accumulators = {}
+    matched = 0
+    for group, info in enumerate(cols["groups"]):
+        selected = None if ast is None else np.flatnonzero(_numpy_mask(cols, group, ast, header))
+        rows = info["n"] if selected is None else len(selected)
+        if not rows:
+            continue
+        matched += rows
+
+        if groups:
+            parts = []
+            for _, j, kind, arg in groups:
+                codes, texts = _columnar_codes(cols, group, j, selected)
+                values = {}
+                remap = np.fromiter(
+                    (values.setdefault(_group_value(text, kind, arg), len(values)) for text in texts),
+                    dtype=np.intp, count=len(texts),
+                )
+                parts.append((remap[codes], list(values)))
+            stacked = np.stack([codes for codes, _ in parts], axis=1)
+            distinct, slots = np.unique(stacked, axis=0, return_inverse=True)
+            slots = slots.reshape(-1)
+            keys = [tuple(values[c] for c, (_, values) in zip(codes, parts)) for codes in distinct.tolist()]
+        else:
+            slots = np.zeros(rows, dtype=np.intp)
+            keys = [()]
+        size = len(keys)
+
+        # Per metric: (n, total, min, max) lists indexed by slot, None where unused
+        reduced = []
+        for _, func, j in metric_specs:
+            if j is None:
+                reduced.append(None)
+                continue
+            if func == "count":
+                present = _columnar_present(cols, group, j, selected)
+                reduced.append((np.bincount(slots, weights=present, minlength=size).astype(np.int64).tolist(),
+                                None, None, None))
+                continue
+            numbers, valid = _columnar_numbers(cols, group, j, selected)
+            at, numbers = slots[valid], numbers[valid]
+            totals = lows = highs = None
+            if func in ("sum", "mean"):
+                totals = np.bincount(at, weights=numbers, minlength=size).tolist()
+            elif func == "min":
+                lows = np.full(size, np.inf)
+                np.minimum.at(lows, at, numbers)
+                lows = lows.tolist()
+            else:
+                highs = np.full(size, -np.inf)
+                np.maximum.at(highs, at, numbers)
+                highs = highs.tolist()
+            reduced.append((np.bincount(at, minlength=size).tolist(), totals, lows, highs))
+
+        for slot, (key, count) in enumerate(zip(keys, np.bincount(slots, minlength=size).tolist())):
+            acc = accumulators.get(key)
+            if acc is None:
+                acc = accumulators[key] = [0] + [[0, 0.0, None, None] for _ in metric_specs]
+            acc[0] += count
+            for state, parts in zip(acc[1:], reduced):
+                if parts is None or not parts[0][slot]:
+                    continue
+                counts, totals, lows, highs = parts
+                state[0] += counts[slot]
+                if totals is not None:
+                    state[1] += totals[slot]
+                if lows is not None and (state[2] is None or lows[slot] < state[2]):
+                    state[2] = lows[slot]
+                if highs is not None and (state[3] is None or highs[slot] > state[3]):
+                    state[3] = highs[slot]
+    return matched, accumulators
+
+
+def _aggregate_file(csv_path: Path, header: list, data_start: int, ast: Optional[tuple],
+                    groups: list, metric_specs: list) -> tuple:
+    """Aggregate a CSV: vectorized over its columnar cache when NumPy is
+    installed, otherwise row by row. Returns (matched, accumulators)."""
+    if np is not None:
+        cols = _open_columnar(csv_path)
+        if cols is not None:
+            try:
+                return _numpy_aggregate(cols, header, ast, groups, metric_specs)
+            finally:
+                _close_columnar(cols)
+    return _aggregate_rows(csv_path, header, data_start, ast, groups, metric_specs)
+
+
+def _top_k_rows(csv_path: Path, header: list, data_start: int, ast: Optional[tuple],
+                column: int, k: int, descending: bool) -> tuple:
+    """The k matching rows ranked by a numeric column. Returns (considered, rows)."""
+    # Min-heap of the k best (key, -ordinal): the root is the entry to beat.
+    # Negating the ordinal makes later rows lose ties, keeping file order.
+    heap = []
+    considered = 0
+    for ordinal, row in _iter_matching_rows(csv_path, header, data_start, ast, {column}):
+        n = _parse_number(row[column] if column < len(row) else "")
+        if n is None:
+            continue
+        considered += 1
+        entry = (n if descending else -n, -ordinal)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+    if not heap:
+        return considered, []
+    best = sorted(heap, reverse=True)
+    return considered, _fetch_rows(csv_path, [-neg_ordinal for _, neg_ordinal in best])
 
 
 # --- Tools ---
@@ -218,24 +2877,537 @@ def sf_check() -> str:
         return "ERROR: Could not check Screaming Frog installation."
 
 
+def _total_memory_bytes() -> Optional[int]:
+    """Physical memory of the host, or None when it can't be determined."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _available_memory_bytes() -> Optional[int]:
+    """Memory available to new processes without swapping (Linux), else None."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _process_tree_rss(root_pids) -> dict:
+    """Resident memory in bytes of each root pid plus all its descendants.
+
+    The SF launcher forks the JVM that does the actual crawling, so the whole
+    tree is counted. Uses `ps`; returns {} where it isn't available.
+    """
+    try:
+        result = subprocess.run(
+            ["ps", "-A", "-o", "pid=,ppid=,rss="],
+            capture_output=True, text=True, timeout=5,
+        )
+    except Exception:
+        return {}
+    if result.returncode != 0:
+        return {}
+    children: dict = {}
+    rss: dict = {}
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        if len(parts) != 3 or not all(p.isdigit() for p in parts):
+            continue
+        pid, ppid, kb = map(int, parts)
+        children.setdefault(ppid, []).append(pid)
+        rss[pid] = kb * 1024
+    totals = {}
+    for root in root_pids:
+        if root not in rss:
+            continue
+        total, stack = 0, [root]
+        while stack:
+            pid = stack.pop()
+            total += rss.get(pid, 0)
+            stack.extend(children.get(pid, ()))
+        totals[root] = total
+    return totals
+
+
+def _crawl_slot_limit() -> int:
+    """Most crawls allowed at once: SF_MAX_CONCURRENT_CRAWLS, else sized from CPUs and RAM."""
+    if MAX_CONCURRENT_CRAWLS > 0:
+        return MAX_CONCURRENT_CRAWLS
+    limit = max(1, (os.cpu_count() or 1) // CRAWL_CPUS_PER_CRAWL)
+    total = _total_memory_bytes()
+    if total:
+        usable = total - CRAWL_MEMORY_RESERVE_GB * 1024 ** 3
+        limit = min(limit, max(1, int(usable // (CRAWL_MEMORY_GB * 1024 ** 3))))
+    return limit
+
+
+def _crawl_admission() -> Optional[str]:
+    """None when another crawl may start now, else why it has to wait."""
+    # A crawl_and_export crawl keeps its slot while its export JVM runs
+    running = [
+        info for info in _running_crawls.values()
+        if info["proc"].returncode is None or info.get("exporting")
+    ]
+    limit = _crawl_slot_limit()
+    if len(running) >= limit:
+        return f"{len(running)} of {limit} crawl slots busy"
+    if not running or MAX_CONCURRENT_CRAWLS > 0:
+        # A pinned limit is taken as-is, and one crawl can always run
+        return None
+
+    cpus = os.cpu_count() or 1
+    try:
+        load = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        load = None
+    if load is not None and load >= cpus * CRAWL_MAX_LOAD_PER_CPU:
+        return f"load average {load:.1f} on {cpus} CPU(s)"
+
+    available = _available_memory_bytes()
+    if available is not None:
+        # Running JVMs grow toward their heap; budget what they haven't claimed yet
+        budget = CRAWL_MEMORY_GB * 1024 ** 3
+        rss = _process_tree_rss([info["pid"] for info in running])
+        pending = sum(max(0, budget - rss.get(info["pid"], 0)) for info in running)
+        headroom = available - pending - CRAWL_MEMORY_RESERVE_GB * 1024 ** 3
+        if headroom < budget:
+            return (
+                f"memory ({available / 1024 ** 3:.1f} GB available, "
+                f"{pending / 1024 ** 3:.1f} GB still reserved for running crawls, "
+                f"{CRAWL_MEMORY_GB:g} GB needed per crawl)"
+            )
+    return None
+
+
+# crawl_and_export: the export options (JSON), the resulting export_id and any export error
+_REGISTRY_ADDED_COLUMNS = (("export_spec", "TEXT"), ("export_id", "TEXT"), ("export_error", "TEXT"))
+
+
+def _registry_connect() -> sqlite3.Connection:
+    """Open the crawl registry, creating it on first use."""
+    conn = sqlite3.connect(CRAWL_REGISTRY_PATH, timeout=5)
+    conn.row_factory = sqlite3.Row
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS crawls ("
+        "crawl_id TEXT PRIMARY KEY, state TEXT NOT NULL, owner INTEGER, url TEXT, label TEXT, "
+        "cmd TEXT, priority INTEGER, seq INTEGER, queued REAL, started REAL, finished REAL, "
+        "pid INTEGER, log_path TEXT, exit_code INTEGER, crawled INTEGER, db_id TEXT, error TEXT)"
+    )
+    # Columns added after the first release of the registry
+    existing = {row["name"] for row in conn.execute("PRAGMA table_info(crawls)")}
+    for name, kind in _REGISTRY_ADDED_COLUMNS:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE crawls ADD COLUMN {name} {kind}")
+    return conn
+
+
+def _registry_save(crawl_id: str, **fields) -> None:
+    """Insert or update a crawl record. Registry failures are logged, never raised."""
+    for name in ("cmd", "export_spec"):
+        if name in fields and fields[name] is not None:
+            fields[name] = json.dumps(fields[name])
+    if "log_path" in fields:
+        fields["log_path"] = str(fields["log_path"])
+    updates = ", ".join(f"{name} = ?" for name in fields)
+    try:
+        conn = _registry_connect()
+        try:
+            with conn:
+                updated = conn.execute(
+                    f"UPDATE crawls SET owner = ?, {updates} WHERE crawl_id = ?",
+                    (os.getpid(), *fields.values(), crawl_id),
+                ).rowcount
+                if not updated:
+                    conn.execute(
+                        f"INSERT INTO crawls (crawl_id, owner, {', '.join(fields)}) "
+                        f"VALUES (?, ?, {', '.join('?' * len(fields))})",
+                        (crawl_id, os.getpid(), *fields.values()),
+                    )
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        logger.warning("Failed to update crawl registry", exc_info=True)
+
+
+def _registry_load(crawl_id: Optional[str] = None) -> list:
+    """Crawl records as dicts, oldest first (all of them, or just crawl_id's)."""
+    try:
+        conn = _registry_connect()
+        try:
+            if crawl_id is None:
+                rows = conn.execute("SELECT * FROM crawls ORDER BY COALESCE(queued, started)").fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM crawls WHERE crawl_id = ?", (crawl_id,)).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        logger.warning("Failed to read crawl registry", exc_info=True)
+        return []
+    return [dict(row) for row in rows]
+
+
+def _prune_crawl_registry() -> None:
+    """Forget finished crawls once their logs have expired."""
+    try:
+        conn = _registry_connect()
+        try:
+            with conn:
+                conn.execute(
+                    "DELETE FROM crawls WHERE state NOT IN ('queued', 'running') AND finished < ?",
+                    (time.time() - LOG_TTL_SECONDS,),
+                )
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        logger.warning("Failed to prune crawl registry", exc_info=True)
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    """Whether a process exists (POSIX only: signal 0 would kill it on Windows)."""
+    if not pid or os.name == "nt":
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _pid_runs_crawl(pid: int, url: str) -> bool:
+    """Guard against PID reuse: the process must still be the SF crawl of url."""
+    try:
+        result = subprocess.run(
+            ["ps", "-o", "command=", "-p", str(pid)],
+            capture_output=True, text=True, timeout=5,
+        )
+    except Exception:
+        return True  # can't tell; trust the PID
+    return result.returncode == 0 and url in result.stdout
+
+
+class _AdoptedCrawlProcess:
+    """Stand-in for the asyncio Process of a crawl started by an earlier server.
+
+    It isn't our child, so the exit code is unknown: returncode becomes -1
+    once the PID is gone.
+    """
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.returncode = None
+
+    async def wait(self) -> int:
+        while _pid_alive(self.pid):
+            await asyncio.sleep(CRAWL_ADOPT_POLL_SECONDS)
+        self.returncode = -1
+        return self.returncode
+
+
+def _replay_crawl_log(info: dict) -> None:
+    """Recover an adopted crawl's output tail and progress from the end of its log.
+
+    Sets info["log_offset"] so _follow_crawl_log carries on from there.
+    """
+    try:
+        with open(info["log_path"], "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            f.seek(max(0, size - CRAWL_LOG_TAIL_BYTES))
+            data = f.read(size - f.tell())
+    except OSError:
+        info["log_offset"] = 0
+        return
+    info["log_offset"] = size
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    if size > CRAWL_LOG_TAIL_BYTES:
+        lines = lines[1:]  # starts mid-line
+    for line in lines:
+        _record_crawl_line(info, line)
+    # Replayed lines all arrive at once; keep one sample so the rate is measured live
+    samples = info["progress"]["samples"]
+    if samples:
+        last = samples[-1]
+        samples.clear()
+        samples.append(last)
+
+
+async def _restore_crawls() -> None:
+    """Load the registry once: re-adopt live crawls and re-queue waiting ones.
+
+    Records owned by another server process that is still running are left
+    alone, so two servers sharing a home directory don't take each other's crawls.
+    """
+    global _crawl_registry_restored, _crawl_queue_seq
+    if _crawl_registry_restored:
+        return
+    _crawl_registry_restored = True
+    _prune_crawl_registry()
+
+    for row in _registry_load():
+        crawl_id = row["crawl_id"]
+        if row["state"] not in ("queued", "running") or crawl_id in _running_crawls or crawl_id in _queued_crawls:
+            continue
+        if row["owner"] != os.getpid() and _pid_alive(row["owner"]):
+            continue
+        if row["state"] == "queued":
+            _queued_crawls[crawl_id] = {
+                "url": row["url"],
+                "label": row["label"],
+                "cmd": json.loads(row["cmd"]),
+                "priority": row["priority"] or 0,
+                "seq": row["seq"] or 0,
+                "queued": row["queued"],
+                "export": json.loads(row["export_spec"]) if row["export_spec"] else None,
+            }
+            _crawl_queue_seq = max(_crawl_queue_seq, row["seq"] or 0)
+            _registry_save(crawl_id, state="queued")  # take ownership
+            continue
+
+        info = {
+            "pid": row["pid"],
+            "proc": _AdoptedCrawlProcess(row["pid"]),
+            "url": row["url"],
+            "label": row["label"],
+            "started": row["started"],
+            "queued": row["queued"],
+            "output": deque(maxlen=CRAWL_OUTPUT_TAIL_LINES),
+            "log_path": Path(row["log_path"]),
+            "adopted": True,
+            "export": json.loads(row["export_spec"]) if row["export_spec"] else None,
+        }
+        info["progress"] = _new_crawl_progress(info["started"])
+        _replay_crawl_log(info)
+        if _pid_alive(row["pid"]) and _pid_runs_crawl(row["pid"], row["url"]):
+            info["recorded"] = asyncio.Event()
+            info["drain"] = asyncio.create_task(_follow_crawl_log(info))
+            info["supervisor"] = asyncio.create_task(_supervise_crawl(crawl_id, info))
+            _running_crawls[crawl_id] = info
+            _registry_save(crawl_id, state="running")
+            logger.info("Re-adopted crawl %s (PID %s)", crawl_id, row["pid"])
+        else:
+            # Exited while no server was watching it
+            _registry_save(
+                crawl_id, state="exited", finished=time.time(), crawled=info["progress"]["crawled"],
+            )
+
+    await _start_queued_crawls()
+
+
+def _sf_database_ids() -> set:
+    """Names of the saved-crawl folders in ProjectInstanceData."""
+    try:
+        return {p.name for p in SF_DATA_DIR.iterdir() if p.is_dir()}
+    except OSError:
+        return set()
+
+
+def _capture_crawl_db_id(crawl_id: str, info: dict) -> Optional[str]:
+    """Database ID of the crawl a finished crawl_site run saved, or None if unsure.
+
+    Prefers the ID SF logged; otherwise the one folder that appeared in
+    ProjectInstanceData since the crawl started (compared with the listing
+    taken at launch, or by mtime for re-adopted crawls), excluding folders
+    already attributed to other crawls.
+    """
+    current = _sf_database_ids()
+    logged = info.get("logged_db_id")
+    if logged and logged in current:
+        return logged
+
+    if "db_snapshot" in info:
+        candidates = current - info["db_snapshot"]
+    else:
+        candidates = set()
+        for name in current:
+            try:
+                if (SF_DATA_DIR / name).stat().st_mtime >= info["started"]:
+                    candidates.add(name)
+            except OSError:
+                continue
+    claimed = {
+        record["db_id"] for record in _registry_load()
+        if record["db_id"] and record["crawl_id"] != crawl_id
+    }
+    claimed.update(
+        other["db_id"] for other in _running_crawls.values() if other is not info and other.get("db_id")
+    )
+    candidates -= claimed
+    return candidates.pop() if len(candidates) == 1 else None
+
+
+def _crawl_queue_order() -> list:
+    """Queued crawl_ids in start order: highest priority first, then oldest."""
+    waiting = [cid for cid, entry in _queued_crawls.items() if "error" not in entry]
+    return sorted(waiting, key=lambda cid: (-_queued_crawls[cid]["priority"], _queued_crawls[cid]["seq"]))
+
+
+async def _launch_crawl(crawl_id: str, url: str, label: str, cmd: list, export: Optional[dict] = None) -> dict:
+    """Start an SF crawl process and register it in _running_crawls."""
+    log_path = LOG_DIR / f"{crawl_id}.log"
+    db_snapshot = _sf_database_ids()
+    # Output goes straight to the log (not a pipe) and the crawl gets its own
+    # session, so it survives the server being stopped or restarted
+    with open(log_path, "ab") as log_file:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+    info = {
+        "pid": proc.pid,
+        "proc": proc,
+        "url": url,
+        "label": label,
+        "started": time.time(),
+        "output": deque(maxlen=CRAWL_OUTPUT_TAIL_LINES),
+        "log_path": log_path,
+        "db_snapshot": db_snapshot,
+        "export": export,
+    }
+    info["progress"] = _new_crawl_progress(info["started"])
+    info["recorded"] = asyncio.Event()
+    info["drain"] = asyncio.create_task(_follow_crawl_log(info))
+    info["supervisor"] = asyncio.create_task(_supervise_crawl(crawl_id, info))
+    _running_crawls[crawl_id] = info
+    _registry_save(
+        crawl_id, state="running", url=url, label=label, cmd=cmd,
+        pid=proc.pid, started=info["started"], log_path=info["log_path"], export_spec=export,
+    )
+    return info
+
+
+async def _supervise_crawl(crawl_id: str, info: dict) -> None:
+    """Wait for a crawl to exit, record it, then hand its slot to the next queued crawl."""
+    proc = info["proc"]
+    try:
+        await proc.wait()
+        try:
+            await asyncio.wait_for(asyncio.shield(info["drain"]), timeout=5)
+        except asyncio.TimeoutError:
+            pass
+        if info.get("adopted"):
+            state, exit_code = "exited", None
+        else:
+            state, exit_code = ("completed" if proc.returncode == 0 else "failed"), proc.returncode
+        if state != "failed":
+            info["db_id"] = _capture_crawl_db_id(crawl_id, info)
+        info["exporting"] = bool(info.get("export")) and state != "failed" and bool(info.get("db_id"))
+        _registry_save(
+            crawl_id, state=state, exit_code=exit_code, finished=time.time(),
+            crawled=info["progress"]["crawled"], db_id=info.get("db_id"),
+        )
+        info["recorded"].set()
+        if info["exporting"]:
+            await _export_finished_crawl(crawl_id, info)
+    finally:
+        info["exporting"] = False
+        info["recorded"].set()
+        await _start_queued_crawls()
+
+
+_EXPORT_ID_RE = re.compile(r"Export ID: (export-[0-9a-f]+)")
+
+
+async def _export_finished_crawl(crawl_id: str, info: dict) -> None:
+    """crawl_and_export: export the saved crawl and build its indexes straight away."""
+    spec = info["export"]
+    try:
+        result = await export_crawl(
+            info["db_id"],
+            export_tabs=spec.get("export_tabs"),
+            bulk_export=spec.get("bulk_export"),
+            build_indexes=spec.get("build_indexes", True),
+            columnar=spec.get("columnar", False),
+        )
+    except Exception:
+        logger.exception("Failed to export crawl")
+        result = "ERROR: Failed to export crawl."
+    info["export_result"] = result
+    m = _EXPORT_ID_RE.search(result)
+    error = result if result.startswith("ERROR") or not m else None
+    _registry_save(crawl_id, export_id=m.group(1) if m else None, export_error=error)
+
+
+async def _start_queued_crawls() -> None:
+    """Start queued crawls while the host has room for them."""
+    async with _crawl_scheduler_lock:
+        while _crawl_queue_order() and _crawl_admission() is None:
+            order = _crawl_queue_order()
+            crawl_id = order[0]
+            entry = _queued_crawls[crawl_id]
+            try:
+                await _launch_crawl(crawl_id, entry["url"], entry["label"], entry["cmd"], entry.get("export"))
+            except Exception:
+                logger.exception("Failed to start queued crawl")
+                entry["error"] = "Failed to start crawl."
+                _registry_save(crawl_id, state="failed", finished=time.time(), error=entry["error"])
+                continue
+            _running_crawls[crawl_id]["queued"] = entry["queued"]
+            del _queued_crawls[crawl_id]
+    if _crawl_queue_order():
+        _watch_crawl_queue()
+
+
+def _watch_crawl_queue() -> None:
+    """Recheck the queue periodically: memory and load free up without any crawl exiting."""
+    global _crawl_queue_watcher
+    if _crawl_queue_watcher is None or _crawl_queue_watcher.done():
+        _crawl_queue_watcher = asyncio.create_task(_poll_crawl_queue())
+
+
+async def _poll_crawl_queue() -> None:
+    while _crawl_queue_order():
+        await asyncio.sleep(CRAWL_ADMIT_RETRY_SECONDS)
+        await _start_queued_crawls()
+
+
 @mcp.tool()
 async def crawl_site(
     url: str,
     config_file: Optional[str] = None,
     label: Optional[str] = None,
     max_urls: Optional[int] = None,
+    priority: int = 0,
+    crawl_and_export: bool = False,
+    export_tabs: Optional[str] = None,
+    bulk_export: Optional[str] = None,
+    build_indexes: bool = True,
+    columnar: bool = False,
 ) -> str:
     """
     Start a background Screaming Frog crawl that saves to SF's internal database.
 
+    When the host has no room for another crawl (slots, memory or load), the
+    crawl is queued and starts automatically once there is.
+
     Args:
         url: The URL to crawl (e.g. https://example.com)
         config_file: Optional path to a .seospiderconfig file for crawl settings
         label: Optional label for identifying this crawl (e.g. 'freshgovjobs')
         max_urls: Optional max number of URLs to crawl (overrides config)
+        priority: Optional queue priority (default 0). Higher starts first;
+            equal priorities start in submission order.
+        crawl_and_export: When the crawl finishes, export it right away (as
+            export_crawl would) without another tool call; crawl_status then
+            shows the export_id. The options below apply only with this set.
+        export_tabs: Export tabs for crawl_and_export (default: export_crawl's defaults)
+        bulk_export: Optional bulk export types for crawl_and_export (e.g. 'All Inlinks')
+        build_indexes: Build search indexes on the export (default True)
+        columnar: Also build the columnar cache on the export
 
     Returns:
-        A crawl_id to use with crawl_status to check progress.
+        A crawl_id to use with crawl_status to check progress (or queue position).
         The crawl runs in the background - use crawl_status to poll.
     """
     if not os.path.exists(SF_CLI_PATH):
@@ -249,12 +3421,8 @@ async def crawl_site(
     if _sf_gui_is_running():
         return SF_GUI_WARNING
 
-    # Enforce concurrent crawl limit
+    await _restore_crawls()
     _cleanup_completed_crawls()
-    active = sum(1 for info in _running_crawls.values()
-                 if info["proc"].returncode is None)
-    if active >= MAX_CONCURRENT_CRAWLS:
-        return f"ERROR: Maximum {MAX_CONCURRENT_CRAWLS} concurrent crawls. Wait for running crawls to finish."
 
     crawl_id = f"crawl-{uuid.uuid4().hex[:8]}"
 
@@ -278,57 +3446,220 @@ async def crawl_site(
             return f"ERROR: max_urls cannot exceed {MAX_CRAWL_SIZE}."
         cmd.extend(["--max-crawl-size", str(int(max_urls))])
 
-    try:
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+    label = label or url.replace("https://", "").replace("http://", "").split("/")[0]
+
+    export = None
+    if crawl_and_export:
+        for param_name, param_val in [("export_tabs", export_tabs), ("bulk_export", bulk_export)]:
+            if param_val:
+                arg_err = _validate_cli_arg(param_val, param_name)
+                if arg_err:
+                    return arg_err
+        export = {
+            "export_tabs": export_tabs,
+            "bulk_export": bulk_export,
+            "build_indexes": build_indexes,
+            "columnar": columnar,
+        }
+    then = (
+        "When it finishes it is exported automatically; crawl_status shows the export_id.\n"
+        if export else ""
+    )
+
+    # Queue behind running crawls (and anything queued at the same or higher
+    # priority) instead of rejecting the submission. Decide and launch (or
+    # enqueue) under the scheduler lock, so concurrent calls can't both pass
+    # admission and overshoot the concurrency limit.
+    global _crawl_queue_seq
+    async with _crawl_scheduler_lock:
+        ahead = [cid for cid in _crawl_queue_order() if _queued_crawls[cid]["priority"] >= priority]
+        waiting_for = _crawl_admission()
+        if not waiting_for and not ahead:
+            try:
+                info = await _launch_crawl(crawl_id, url, label, cmd, export)
+            except Exception:
+                logger.exception("Failed to start crawl")
+                return "ERROR: Failed to start crawl."
+        else:
+            # Entries that failed to launch wait only to report their error
+            if len(_crawl_queue_order()) >= MAX_QUEUED_CRAWLS:
+                return f"ERROR: Crawl queue is full ({MAX_QUEUED_CRAWLS} waiting). Try again later."
+            _crawl_queue_seq += 1
+            _queued_crawls[crawl_id] = {
+                "url": url,
+                "label": label,
+                "cmd": cmd,
+                "priority": priority,
+                "seq": _crawl_queue_seq,
+                "queued": time.time(),
+                "export": export,
+            }
+            _registry_save(
+                crawl_id, state="queued", url=url, label=label, cmd=cmd, priority=priority,
+                seq=_crawl_queue_seq, queued=_queued_crawls[crawl_id]["queued"], export_spec=export,
+            )
+
+    if crawl_id in _queued_crawls:
+        # A slot may have freed up while nothing was waiting on it
+        await _start_queued_crawls()
+        entry = _queued_crawls.get(crawl_id)
+        if entry is not None and "error" in entry:
+            del _queued_crawls[crawl_id]
+            return f"ERROR: {entry['error']}"
+        if entry is not None:
+            order = _crawl_queue_order()
+            return (
+                f"Crawl queued, waiting for: {waiting_for or 'higher-priority crawls'}\n"
+                f"Crawl ID: {crawl_id}\n"
+                f"Queue position: {order.index(crawl_id) + 1} of {len(order)} (priority {priority})\n"
+                f"URL: {url}\n"
+                f"Label: {label}\n\n"
+                f"It starts automatically when a slot frees up. {then}"
+                f"Use crawl_status(crawl_id='{crawl_id}') to check."
+            )
+        info = _running_crawls[crawl_id]
+
+    return (
+        f"Crawl started in background.\n"
+        f"Crawl ID: {crawl_id}\n"
+        f"PID: {info['pid']}\n"
+        f"URL: {url}\n"
+        f"Label: {label}\n\n"
+        f"{then}"
+        f"Use crawl_status(crawl_id='{crawl_id}') to check progress."
+    )
+
+
+def _saved_crawl_hint(db_id: Optional[str]) -> str:
+    """Closing lines of crawl_status for a crawl that saved to SF's database."""
+    if db_id:
+        return (
+            f"Database ID: {db_id}\n\n"
+            f"The crawl is saved in SF's internal database.\n"
+            f"Use export_crawl(db_id='{db_id}') to export data as CSV."
         )
+    return (
+        f"\nThe crawl is saved in SF's internal database.\n"
+        f"Use list_crawls() to see all saved crawls and get the DB ID.\n"
+        f"Then use export_crawl(db_id='...') to export data as CSV."
+    )
 
-        _running_crawls[crawl_id] = {
-            "pid": proc.pid,
-            "proc": proc,
-            "url": url,
-            "label": label or url.replace("https://", "").replace("http://", "").split("/")[0],
-            "started": time.time(),
-        }
 
-        return (
-            f"Crawl started in background.\n"
-            f"Crawl ID: {crawl_id}\n"
-            f"PID: {proc.pid}\n"
-            f"URL: {url}\n"
-            f"Label: {_running_crawls[crawl_id]['label']}\n\n"
-            f"Use crawl_status(crawl_id='{crawl_id}') to check progress."
+def _crawl_export_status(crawl_id: str, info: dict) -> str:
+    """crawl_status lines on a crawl_and_export crawl's automatic export."""
+    if info.get("exporting"):
+        running = [
+            job["export_id"] for job in _export_jobs.values()
+            if job["db_id"] == info.get("db_id") and job["status"] == "running"
+        ]
+        text = "Automatic export is running"
+        if running:
+            text += f" (Export ID: {running[0]}, see export_status(export_id='{running[0]}'))"
+        return text + f".\nUse crawl_status(crawl_id='{crawl_id}', wait_seconds=300) to wait for it."
+    if "export_result" in info:
+        return "Automatic export:\n" + info["export_result"]
+    if not info.get("db_id"):
+        return "Automatic export skipped: the Database ID could not be determined."
+    return "Automatic export skipped."
+
+
+def _format_crawl_record(record: dict) -> str:
+    """crawl_status text for a finished crawl known only from the registry."""
+    if record["state"] == "completed":
+        status = "completed"
+    elif record["error"]:
+        status = f"failed ({record['error']})"
+    elif record["state"] == "failed":
+        status = f"failed (exit code {record['exit_code']})"
+    else:
+        status = "finished (exit code unknown: the server restarted while it ran)"
+    text = f"Crawl {record['crawl_id']} {status}.\nURL: {record['url']}\nLabel: {record['label']}\n"
+    if record["started"] and record["finished"]:
+        elapsed = record["finished"] - record["started"]
+        text += f"Elapsed: {int(elapsed // 60)}m {int(elapsed % 60)}s\n"
+    if record["crawled"] is not None:
+        text += f"URLs crawled: {record['crawled']}\n"
+    if record["log_path"]:
+        text += f"Full log: {record['log_path']}\n"
+    if record["state"] == "failed":
+        return text
+    text += _saved_crawl_hint(record["db_id"])
+    if record["export_error"]:
+        text += f"\n\nAutomatic export failed:\n{record['export_error']}"
+    elif record["export_id"] in _export_dirs:
+        text += f"\n\nAutomatic export:\n{_export_summary(record['export_id'])}"
+    elif record["export_id"]:
+        text += (
+            f"\n\nAutomatic export {record['export_id']} has expired; "
+            f"run export_crawl(db_id='{record['db_id']}') again."
         )
-    except Exception:
-        logger.exception("Failed to start crawl")
-        return "ERROR: Failed to start crawl."
+    return text
 
 
 @mcp.tool()
-async def crawl_status(crawl_id: str) -> str:
+async def crawl_status(
+    crawl_id: str,
+    wait_seconds: int = 0,
+    ctx: Optional[Context] = None,
+) -> str:
     """
     Check the status of a running or completed crawl.
 
     Args:
         crawl_id: The crawl_id returned by crawl_site
+        wait_seconds: Optional time to wait for the crawl to finish (max 300),
+            sending progress notifications meanwhile. Default 0 returns immediately.
     """
+    await _restore_crawls()
+    deadline = time.monotonic() + max(0, min(wait_seconds, MAX_STATUS_WAIT_SECONDS))
+    if crawl_id in _queued_crawls:
+        entry = _queued_crawls[crawl_id]
+        if "error" in entry:
+            del _queued_crawls[crawl_id]
+            return f"ERROR: Queued crawl {crawl_id} could not be started: {entry['error']}"
+        # Wait for a slot if asked to; once started, fall through to the running checks
+        while crawl_id in _queued_crawls and time.monotonic() < deadline:
+            await asyncio.sleep(min(PROGRESS_NOTIFY_INTERVAL, max(deadline - time.monotonic(), 0.1)))
+        if crawl_id in _queued_crawls:
+            order = _crawl_queue_order()
+            waited = time.time() - entry["queued"]
+            return (
+                f"Crawl {crawl_id} is queued.\n"
+                f"URL: {entry['url']}\n"
+                f"Label: {entry['label']}\n"
+                f"Queue position: {order.index(crawl_id) + 1} of {len(order)} "
+                f"(priority {entry['priority']})\n"
+                f"Waiting: {int(waited // 60)}m {int(waited % 60)}s, "
+                f"for: {_crawl_admission() or 'crawls ahead in the queue'}\n\n"
+                f"Use crawl_status(crawl_id='{crawl_id}') to check again."
+            )
+
     if crawl_id not in _running_crawls:
+        records = _registry_load(crawl_id)
+        if records and records[0]["state"] not in ("queued", "running"):
+            return _format_crawl_record(records[0])
         active = ", ".join(_running_crawls.keys()) if _running_crawls else "none"
-        return f"Unknown crawl_id: {crawl_id}\nActive crawls: {active}"
+        queued = ", ".join(_crawl_queue_order()) or "none"
+        return f"Unknown crawl_id: {crawl_id}\nActive crawls: {active}\nQueued crawls: {queued}"
 
     info = _running_crawls[crawl_id]
     proc = info["proc"]
-    elapsed = time.time() - info["started"]
-    elapsed_str = f"{int(elapsed // 60)}m {int(elapsed % 60)}s"
+    progress = info["progress"]
 
     if proc.returncode is None:
-        # Still running - check without blocking
-        try:
-            await asyncio.wait_for(proc.wait(), timeout=0.1)
-        except asyncio.TimeoutError:
-            pass
+        # Still running - check without blocking, or long-poll with progress updates
+        while True:
+            await _report_crawl_progress(ctx, progress)
+            timeout = min(PROGRESS_NOTIFY_INTERVAL, deadline - time.monotonic())
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=max(timeout, 0.1))
+            except asyncio.TimeoutError:
+                pass
+            if proc.returncode is not None or time.monotonic() >= deadline:
+                break
+
+    elapsed = time.time() - info["started"]
+    elapsed_str = f"{int(elapsed // 60)}m {int(elapsed % 60)}s"
 
     if proc.returncode is None:
         return (
@@ -336,27 +3667,38 @@ async def crawl_status(crawl_id: str) -> str:
             f"URL: {info['url']}\n"
             f"Label: {info['label']}\n"
             f"PID: {info['pid']}\n"
-            f"Elapsed: {elapsed_str}\n\n"
-            f"Use crawl_status(crawl_id='{crawl_id}') to check again."
+            f"Elapsed: {elapsed_str}\n"
+            + _format_crawl_progress(progress, running=True)
+            + f"\nUse crawl_status(crawl_id='{crawl_id}') to check again."
         )
 
-    # Process completed
-    stdout = ""
-    stderr = ""
-    if proc.stdout:
-        raw = await proc.stdout.read()
-        stdout = raw.decode("utf-8", errors="replace")
-    if proc.stderr:
-        raw = await proc.stderr.read()
-        stderr = raw.decode("utf-8", errors="replace")
+    # Process completed - let the supervisor finish reading the log and find the Database ID
+    try:
+        await asyncio.wait_for(info["recorded"].wait(), timeout=10)
+    except asyncio.TimeoutError:
+        pass
+    # With crawl_and_export, keep waiting (within wait_seconds) for the export too
+    remaining = deadline - time.monotonic()
+    if info.get("exporting") and remaining > 0:
+        try:
+            await asyncio.wait_for(asyncio.shield(info["supervisor"]), timeout=remaining)
+        except asyncio.TimeoutError:
+            pass
+    output = list(info["output"])
 
     # Extract useful info from logs
     urls_crawled = "unknown"
-    for line in (stdout + stderr).splitlines():
-        if "URLs crawled" in line.lower() or "crawl complete" in line.lower():
-            urls_crawled = line.strip()
+    if progress["crawled"] is not None:
+        urls_crawled = str(progress["crawled"])
+    else:
+        for line in output:
+            if "urls crawled" in line.lower() or "crawl complete" in line.lower():
+                urls_crawled = line.strip()
 
-    status = "completed" if proc.returncode == 0 else f"failed (exit code {proc.returncode})"
+    if info.get("adopted"):
+        status = "finished (exit code unknown: it was re-adopted after a server restart)"
+    else:
+        status = "completed" if proc.returncode == 0 else f"failed (exit code {proc.returncode})"
 
     result = (
         f"Crawl {crawl_id} {status}.\n"
@@ -368,16 +3710,12 @@ async def crawl_status(crawl_id: str) -> str:
 
     if proc.returncode != 0:
         # Show last 20 lines of output for debugging
-        all_output = (stdout + stderr).strip().splitlines()
-        tail = "\n".join(all_output[-20:])
-        result += f"\nLast output:\n{tail}"
-
-    result += (
-        f"\n\nThe crawl is saved in SF's internal database.\n"
-        f"Use list_crawls() to see all saved crawls and get the DB ID.\n"
-        f"Then use export_crawl(db_id='...') to export data as CSV."
-    )
+        tail = "\n".join(output[-20:])
+        result += f"\nLast output:\n{tail}\n\nFull log: {info['log_path']}\n"
 
+    result += _saved_crawl_hint(info.get("db_id"))
+    if info.get("export") and proc.returncode is not None:
+        result += "\n\n" + _crawl_export_status(crawl_id, info)
     return result
 
 
@@ -447,12 +3785,188 @@ def list_crawls() -> str:
         return "ERROR: Failed to list crawls."
 
 
+async def _run_export(job: dict) -> str:
+    """Run SF for an export job, merge reused files and register the export.
+
+    Shared by blocking and background exports. Returns the message export_crawl
+    (or export_status) shows, and stores it in job["result"].
+    """
+    export_id = job["export_id"]
+    export_dir = job["path"]
+    db_id = job["db_id"]
+    try:
+        if job["cmd"]:
+            proc = await asyncio.create_subprocess_exec(
+                *job["cmd"],
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=1024 * 1024,
+            )
+            job["proc"] = proc
+            drain = asyncio.create_task(_drain_process_output(proc, job))
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=job["timeout"])
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                # Timed out, or the client cancelled a blocking export_crawl
+                proc.kill()
+                await proc.wait()
+                raise
+            finally:
+                try:
+                    await asyncio.wait_for(drain, timeout=5)
+                except asyncio.TimeoutError:
+                    drain.cancel()
+
+            if proc.returncode != 0:
+                tail = "\n".join(list(job["output"])[-15:])
+                return _finish_export_job(
+                    job, f"ERROR exporting crawl (exit code {proc.returncode}):\n{tail}"
+                )
+
+        # Merge in the files reused from earlier exports
+        sources = {}
+        for src_dir, src_file in job["reusable"].values():
+            rel_path = _link_export_file(src_file, src_dir, export_dir)
+            sources[rel_path] = (src_dir, rel_path)
+
+        # Describe generated files (row counts, headers, column types).
+        # Entries for reused files come from their source export's manifest.
+        known = {}
+        for src_dir in {src_dir for src_dir, _ in job["reusable"].values()}:
+            known.update(_load_manifest(src_dir)["files"])
+        manifest = await asyncio.to_thread(_build_manifest, export_dir, known)
+        csv_files = list(manifest["files"])
+
+        _export_dirs[export_id] = {
+            "path": export_dir,
+            "created": time.time(),
+            "db_id": db_id,
+            "rows": 0,
+            "cache_key": None,
+            "stamp": job["stamp"],
+            "items": job["items"],
+            "manifest": manifest,
+        }
+
+        if not csv_files:
+            return _finish_export_job(job, (
+                f"Export completed but no CSV files were generated.\n"
+                f"Export ID: {export_id}\n"
+                f"This may mean the crawl DB ID is invalid or the crawl has no data.\n"
+                f"Check the DB ID with list_crawls()."
+            ))
+
+        # Check if CSVs are empty (headers only, no data rows).
+        # This is the telltale sign that the SF GUI has the database locked.
+        total_data_rows = sum(entry["rows"] for entry in manifest["files"].values())
+
+        if total_data_rows == 0:
+            gui_hint = ""
+            if _sf_gui_is_running():
+                gui_hint = (
+                    " The Screaming Frog GUI is currently running — this is almost certainly "
+                    "the cause. Quit the GUI and re-run the export."
+                )
+            return _finish_export_job(job, (
+                f"WARNING: Export produced {len(csv_files)} CSV file(s) but ALL are empty "
+                f"(headers only, 0 data rows). This typically means the SF GUI has the "
+                f"crawl database locked.{gui_hint}\n\n"
+                f"Export ID: {export_id}\n"
+                f"DB ID: {db_id}"
+            ))
+
+        # Load the CSVs into SQLite for query_crawl_data. A failure here is not
+        # fatal — query_crawl_data retries the ingestion on first use.
+        try:
+            async with _ingest_locks.setdefault(export_id, asyncio.Lock()):
+                await asyncio.to_thread(_ingest_export, export_dir, sources, manifest)
+        except Exception:
+            logger.exception("Failed to load export into SQLite")
+
+        # Only exports with data are worth reusing
+        _export_dirs[export_id]["rows"] = total_data_rows
+        _export_dirs[export_id]["cache_key"] = job["cache_key"]
+        _export_cache[job["cache_key"]] = export_id
+
+        result = (
+            f"Export completed. {len(csv_files)} CSV files generated "
+            f"({total_data_rows} total data rows).\n"
+        )
+        if job["build_indexes"]:
+            try:
+                n_indexed = await asyncio.to_thread(_build_search_indexes, export_dir, manifest)
+                result += f"Built search indexes for {n_indexed} file(s).\n"
+            except Exception:
+                logger.exception("Failed to build search indexes")
+                result += "WARNING: Failed to build search indexes; filters will scan.\n"
+        if job["columnar"]:
+            try:
+                n_transcoded = await asyncio.to_thread(_build_columnar_cache, export_dir, manifest)
+                result += f"Built columnar cache for {n_transcoded} file(s).\n"
+            except Exception:
+                logger.exception("Failed to build columnar cache")
+                result += "WARNING: Failed to build the columnar cache; reads will parse CSV.\n"
+        if job["reusable"]:
+            result += (
+                f"Reused {len(job['reusable'])} file(s) from earlier exports of this crawl; "
+                f"exported {job['n_missing']} missing item(s).\n"
+            )
+        return _finish_export_job(job, result + _export_summary(export_id))
+    except asyncio.CancelledError:
+        # Free the job's slot so the same export can be retried; an export that
+        # never got as far as the cache is incomplete and left for cleanup
+        if _export_cache.get(job["cache_key"]) != export_id:
+            _export_dirs.pop(export_id, None)
+        _finish_export_job(job, "ERROR: Export cancelled.")
+        raise
+    except asyncio.TimeoutError:
+        limit = f"{job['timeout'] // 60}m {job['timeout'] % 60}s"
+        return _finish_export_job(job, (
+            f"ERROR: Export timed out ({limit} limit). The crawl may be very large — "
+            f"retry with background=True and a larger timeout, or export fewer tabs."
+        ))
+    except Exception:
+        logger.exception("Failed to export crawl")
+        return _finish_export_job(job, "ERROR: Failed to export crawl.")
+
+
+def _finish_export_job(job: dict, result: str) -> str:
+    """Record an export job's final message and mark it finished."""
+    job["result"] = result
+    job["status"] = "completed" if job["export_id"] in _export_dirs else "failed"
+    job["finished"] = time.time()
+    return result
+
+
+def _export_job_files(job: dict) -> list:
+    """Lines describing the CSV files an export job has written so far."""
+    export_dir = job["path"]
+    files = []
+    for f in export_dir.rglob("*.csv"):
+        try:
+            st = f.stat()
+        except OSError:
+            continue
+        files.append((st.st_mtime, f.relative_to(export_dir), st.st_size))
+    files.sort()
+    lines = []
+    for i, (_, rel_path, size) in enumerate(files):
+        # SF writes files one after another; the newest one may still be growing
+        state = " (writing)" if i == len(files) - 1 and job["status"] == "running" else ""
+        lines.append(f"  {rel_path} ({_format_size(size)}){state}")
+    return lines
+
+
 @mcp.tool()
 async def export_crawl(
     db_id: str,
     export_tabs: Optional[str] = None,
     bulk_export: Optional[str] = None,
     save_report: Optional[str] = None,
+    background: bool = False,
+    timeout: Optional[int] = None,
+    build_indexes: bool = False,
+    columnar: bool = False,
 ) -> str:
     """
     Load a saved crawl from SF's database and export data as CSV files.
@@ -462,6 +3976,17 @@ async def export_crawl(
         export_tabs: Comma-separated export tabs (default: Internal:All,Response Codes:All,Page Titles:All,Meta Description:All,H1:All,H2:All,Images:All,Canonicals:All,Directives:All). See the export-reference resource for all options.
         bulk_export: Optional bulk export types (e.g. 'All Inlinks,All Outlinks')
         save_report: Optional reports to save (e.g. 'Crawl Overview')
+        background: Return an export_id immediately and run the export in the
+            background; poll with export_status. Use for large bulk exports.
+        timeout: Optional time limit in seconds (default scales with crawl size)
+        build_indexes: Also build search indexes: a trigram index over the Address/
+            Source/Destination columns, and bitmap indexes over Status Code,
+            Indexability, Indexability Status, Content Type and Crawl Depth. read_crawl_data
+            filters on these columns then skip full scans. Worth it for large exports
+            you will filter often.
+        columnar: Also transcode each CSV into a typed, memory-mapped columnar cache,
+            so read_crawl_data decodes only the columns a filter uses instead of
+            parsing CSV text. Worth it for large exports you will read many times.
 
     Returns:
         An export_id and list of generated CSV files. Use read_crawl_data to read them.
@@ -480,128 +4005,192 @@ async def export_crawl(
             if arg_err:
                 return arg_err
 
-    if _sf_gui_is_running():
-        return SF_GUI_WARNING
-
     _cleanup_old_exports()
 
-    # Enforce export limit
-    if len(_export_dirs) >= MAX_ACTIVE_EXPORTS:
-        return f"ERROR: Maximum {MAX_ACTIVE_EXPORTS} active exports. Wait for cleanup or delete old exports."
+    tabs = export_tabs or DEFAULT_EXPORT_TABS
 
-    export_id = f"export-{uuid.uuid4().hex[:8]}"
-    export_dir = TEMP_EXPORT_BASE / export_id
-    export_dir.mkdir(parents=True, exist_ok=True)
+    # Reuse an identical export of an unchanged crawl instead of relaunching SF
+    stats = _crawl_db_stats(db_id)
+    stamp = _crawl_db_stamp(stats)
+    cache_key = _export_cache_key(db_id, tabs, bulk_export, save_report, stamp)
+    cached_id = _cached_export(cache_key)
+    if cached_id:
+        cached = _export_dirs[cached_id]
+        cached["created"] = time.time()  # restart the TTL for the reused export
+        manifest = _export_manifest(cached_id)
+        result = (
+            f"Export reused from cache (same crawl and export options, crawl unchanged). "
+            f"{len(manifest['files'])} CSV files ({cached['rows']} total data rows).\n"
+        )
+        if build_indexes:
+            try:
+                await asyncio.to_thread(_build_search_indexes, cached["path"], manifest)
+            except Exception:
+                logger.exception("Failed to build search indexes")
+                result += "WARNING: Failed to build search indexes; filters will scan.\n"
+        if columnar:
+            try:
+                await asyncio.to_thread(_build_columnar_cache, cached["path"], manifest)
+            except Exception:
+                logger.exception("Failed to build columnar cache")
+                result += "WARNING: Failed to build the columnar cache; reads will parse CSV.\n"
+        return result + _export_summary(cached_id)
 
-    tabs = export_tabs or DEFAULT_EXPORT_TABS
+    # The same export may already be running in the background
+    for job in _export_jobs.values():
+        if job["cache_key"] == cache_key and job["status"] == "running":
+            return (
+                f"An identical export is already running.\n"
+                f"Export ID: {job['export_id']}\n\n"
+                f"Use export_status(export_id='{job['export_id']}') to check progress."
+            )
 
-    cmd = [
-        SF_CLI_PATH,
-        "--headless",
-        "--load-crawl", db_id,
-        "--export-tabs", tabs,
-        "--output-folder", str(export_dir),
-        "--timestamped-output",
-    ]
+    # Tabs already exported from this crawl are linked in; SF only runs for the rest
+    items = _export_items(tabs, bulk_export, save_report)
+    reusable = _find_reusable_files(db_id, stamp, items)
+    missing = {"tabs": [], "bulk_export": [], "save_report": []}
+    for option, name in items:
+        if (option, name) not in reusable:
+            missing[option].append(name)
+    needs_sf = any(missing.values())
 
-    if bulk_export:
-        cmd.extend(["--bulk-export", bulk_export])
+    if needs_sf and _sf_gui_is_running():
+        return SF_GUI_WARNING
 
-    if save_report:
-        cmd.extend(["--save-report", save_report])
+    # Enforce export limit
+    running_jobs = sum(1 for job in _export_jobs.values() if job["status"] == "running")
+    if len(_export_dirs) + running_jobs >= MAX_ACTIVE_EXPORTS:
+        return f"ERROR: Maximum {MAX_ACTIVE_EXPORTS} active exports. Wait for cleanup or delete old exports."
 
-    try:
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
+    if timeout is not None and timeout <= 0:
+        return "ERROR: timeout must be a positive number of seconds."
 
-        stdout_raw, stderr_raw = await asyncio.wait_for(
-            proc.communicate(), timeout=300
-        )
-        stdout = stdout_raw.decode("utf-8", errors="replace")
-        stderr = stderr_raw.decode("utf-8", errors="replace")
-
-        if proc.returncode != 0:
-            all_output = (stdout + stderr).strip().splitlines()
-            tail = "\n".join(all_output[-15:])
-            return f"ERROR exporting crawl (exit code {proc.returncode}):\n{tail}"
-
-        # List generated files
-        csv_files = sorted(export_dir.rglob("*.csv"))
-        file_list = []
-        for f in csv_files:
-            size = f.stat().st_size
-            size_str = f"{size / 1024:.1f} KB" if size < 1024 * 1024 else f"{size / (1024 * 1024):.1f} MB"
-            rel_path = f.relative_to(export_dir)
-            file_list.append(f"  {rel_path} ({size_str})")
+    export_id = f"export-{uuid.uuid4().hex[:8]}"
+    export_dir = TEMP_EXPORT_BASE / export_id
+    export_dir.mkdir(parents=True, exist_ok=True)
 
-        _export_dirs[export_id] = {
-            "path": export_dir,
-            "created": time.time(),
-            "db_id": db_id,
-        }
+    cmd = []
+    if needs_sf:
+        cmd = [
+            SF_CLI_PATH,
+            "--headless",
+            "--load-crawl", db_id,
+            "--output-folder", str(export_dir),
+            "--timestamped-output",
+        ]
+
+        if missing["tabs"]:
+            cmd.extend(["--export-tabs", ",".join(missing["tabs"])])
+
+        if missing["bulk_export"]:
+            cmd.extend(["--bulk-export", ",".join(missing["bulk_export"])])
+
+        if missing["save_report"]:
+            cmd.extend(["--save-report", ",".join(missing["save_report"])])
+
+    job = {
+        "export_id": export_id,
+        "path": export_dir,
+        "db_id": db_id,
+        "cmd": cmd,
+        "reusable": reusable,
+        "n_missing": sum(len(names) for names in missing.values()),
+        "items": items,
+        "stamp": stamp,
+        "cache_key": cache_key,
+        "build_indexes": build_indexes,
+        "columnar": columnar,
+        "timeout": min(timeout, EXPORT_TIMEOUT_MAX) if timeout else _export_timeout(stats, len(missing["bulk_export"])),
+        "started": time.time(),
+        "status": "running",
+        "result": None,
+        "proc": None,
+        "output": deque(maxlen=CRAWL_OUTPUT_TAIL_LINES),
+        "log_path": LOG_DIR / f"{export_id}.log",
+    }
+    _export_jobs[export_id] = job
+
+    if not background:
+        return await _run_export(job)
+
+    job["task"] = asyncio.create_task(_run_export(job))
+    return (
+        f"Export started in background.\n"
+        f"Export ID: {export_id}\n"
+        f"DB ID: {db_id}\n"
+        f"Timeout: {job['timeout'] // 60}m {job['timeout'] % 60}s\n\n"
+        f"Use export_status(export_id='{export_id}') to check progress."
+    )
 
-        if not file_list:
-            return (
-                f"Export completed but no CSV files were generated.\n"
-                f"Export ID: {export_id}\n"
-                f"This may mean the crawl DB ID is invalid or the crawl has no data.\n"
-                f"Check the DB ID with list_crawls()."
-            )
 
-        # Check if CSVs are empty (headers only, no data rows).
-        # This is the telltale sign that the SF GUI has the database locked.
-        total_data_rows = 0
-        for f in csv_files:
+@mcp.tool()
+async def export_status(
+    export_id: str,
+    wait_seconds: int = 0,
+    ctx: Optional[Context] = None,
+) -> str:
+    """
+    Check the status of an export started with export_crawl(background=True).
+
+    Args:
+        export_id: The export_id returned by export_crawl
+        wait_seconds: Optional time to wait for the export to finish (max 300),
+            sending progress notifications meanwhile. Default 0 returns immediately.
+    """
+    if export_id not in _export_jobs:
+        if export_id in _export_dirs:
+            return f"Export {export_id} completed.\n" + _export_summary(export_id)
+        running = [eid for eid, job in _export_jobs.items() if job["status"] == "running"]
+        return f"Unknown export_id: {export_id}\nRunning exports: {', '.join(running) or 'none'}"
+
+    job = _export_jobs[export_id]
+    deadline = time.monotonic() + max(0, min(wait_seconds, MAX_STATUS_WAIT_SECONDS))
+    while job["status"] == "running":
+        if ctx is not None:
+            done = len(_export_job_files(job))
             try:
-                with open(f, "r", newline="", encoding="utf-8-sig") as fh:
-                    reader = csv.reader(fh)
-                    rows = sum(1 for _ in reader)
-                    total_data_rows += max(0, rows - 1)  # subtract header
+                await ctx.report_progress(done, job["n_missing"], f"{done} file(s) written")
             except Exception:
-                pass
+                logger.debug("Failed to send progress notification", exc_info=True)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(PROGRESS_NOTIFY_INTERVAL, remaining))
 
-        if total_data_rows == 0:
-            gui_hint = ""
-            if _sf_gui_is_running():
-                gui_hint = (
-                    " The Screaming Frog GUI is currently running — this is almost certainly "
-                    "the cause. Quit the GUI and re-run the export."
-                )
-            return (
-                f"WARNING: Export produced {len(csv_files)} CSV file(s) but ALL are empty "
-                f"(headers only, 0 data rows). This typically means the SF GUI has the "
-                f"crawl database locked.{gui_hint}\n\n"
-                f"Export ID: {export_id}\n"
-                f"DB ID: {db_id}"
-            )
+    if job["status"] != "running":
+        return job["result"]
 
-        return (
-            f"Export completed. {len(csv_files)} CSV files generated "
-            f"({total_data_rows} total data rows).\n"
-            f"Export ID: {export_id}\n"
-            f"DB ID: {db_id}\n\n"
-            f"Files:\n" + "\n".join(file_list) + "\n\n"
-            f"Use read_crawl_data(export_id='{export_id}', file='filename.csv') to read data.\n"
-            f"Files auto-delete after 1 hour."
-        )
-    except asyncio.TimeoutError:
-        return "ERROR: Export timed out (5 minute limit). The crawl may be very large."
-    except Exception:
-        logger.exception("Failed to export crawl")
-        return "ERROR: Failed to export crawl."
+    elapsed = time.time() - job["started"]
+    files = _export_job_files(job)
+    result = (
+        f"Export {export_id} is still running.\n"
+        f"DB ID: {job['db_id']}\n"
+        f"Elapsed: {int(elapsed // 60)}m {int(elapsed % 60)}s "
+        f"(timeout {job['timeout'] // 60}m {job['timeout'] % 60}s)\n"
+        f"Files written: {len(files)} of ~{job['n_missing']} being exported"
+    )
+    if job["reusable"]:
+        result += f" (+{len(job['reusable'])} reused from earlier exports)"
+    result += "\n"
+    if files:
+        result += "\n".join(files) + "\n"
+    result += f"\nUse export_status(export_id='{export_id}') to check again."
+    return result
 
 
 @mcp.tool()
-def read_crawl_data(
+async def read_crawl_data(
     export_id: str,
     file: str,
     limit: int = 100,
     offset: int = 0,
     filter_column: Optional[str] = None,
     filter_value: Optional[Union[str, int, float]] = None,
+    columns: Optional[str] = None,
+    where: Optional[str] = None,
+    cursor: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    sort_order: str = "asc",
 ) -> str:
     """
     Read CSV data from an export. Use after export_crawl.
@@ -613,6 +4202,24 @@ def read_crawl_data(
         offset: Number of rows to skip (for pagination)
         filter_column: Optional column name to filter by
         filter_value: Optional value to match in the filter column (case-insensitive substring)
+        columns: Optional comma-separated column names to return (default: all).
+            Internal:All has 60+ columns, so selecting a few saves a lot of output.
+        where: Optional filter expression, e.g. 'Response Time > 2 AND Word Count < 200'
+            or "Status Code in (404, 410) OR Address ~ '/blog/'". Operators: = != > >= < <=
+            ~ (regex) !~ contains, not contains, in (...), not in (...), combined with
+            AND / OR / NOT and parentheses. Quote values containing operators or commas.
+            Wrap column names in backticks when they contain parentheses or other
+            punctuation, or are a keyword (and, or, not, in, contains), e.g.
+            '`Size (bytes)` > 500000'. Plain multi-word names like Response Time work as-is.
+        cursor: Optional cursor from the previous page's output. Resumes the scan right
+            after the last returned row, so paging through a filter never rescans
+            earlier rows. Use the same file and filters; offset is ignored.
+            The first filtered read records which rows matched, so later pages
+            (by offset or cursor) and the match count skip the rescan.
+        sort_by: Optional column to order rows by: numbers numerically, then text,
+            then empty cells. The first sorted read of a column sorts the whole file
+            (on disk for large files); later pages in that order are direct seeks.
+        sort_order: 'asc' (default) or 'desc'
 
     Returns:
         CSV data as formatted text with column headers.
@@ -620,95 +4227,552 @@ def read_crawl_data(
     # Coerce filter_value to string (MCP clients may send numbers as int/float)
     if filter_value is not None:
         filter_value = str(filter_value)
+    limit = max(1, limit)
+    offset = max(0, offset)
+    if sort_order.lower() not in ("asc", "desc"):
+        return "ERROR: sort_order must be 'asc' or 'desc'."
+    descending = sort_order.lower() == "desc"
 
-    if export_id not in _export_dirs:
-        active = ", ".join(_export_dirs.keys()) if _export_dirs else "none"
-        return f"Unknown export_id: {export_id}\nActive exports: {active}"
+    export_dir, target, err = _resolve_export_file(export_id, file)
+    if err:
+        return err
 
-    export_dir = _export_dirs[export_id]["path"]
-    if not export_dir.exists():
-        del _export_dirs[export_id]
-        return "Export directory has been cleaned up. Run export_crawl again."
+    try:
+        header, data_start = _read_csv_header(target)
+        indices, err = _resolve_columns(header, columns)
+        if err:
+            return err
+
+        ast = None
+        predicate = None
+        canonical_where = None
+        if where:
+            try:
+                ast = _parse_where(where)
+                predicate = _compile_predicate(ast, header)
+            except ValueError as e:
+                return f"ERROR: Invalid where clause: {e}"
+            canonical_where = repr(ast)
+
+        needle = filter_value.lower() if filter_column and filter_value else None
+        col_idx = header.index(filter_column) if filter_column in header else None
+        filtering = needle is not None or predicate is not None
+
+        def matches_filters(row: list) -> bool:
+            if needle is not None:
+                cell = row[col_idx] if col_idx is not None and col_idx < len(row) else ""
+                if needle not in cell.lower():
+                    return False
+            return predicate is None or predicate(row)
+
+        sort_column = None
+        if sort_by:
+            sorted_by, err = _resolve_columns(header, sort_by)
+            if err:
+                return err
+            sort_column = sorted_by[0]
+
+        fingerprint = _read_fingerprint(
+            target, filter_column if needle is not None else None, needle, canonical_where,
+            None if sort_column is None else [header[sort_column], descending],
+        )
+        resume = None
+        if cursor:
+            resume = _decode_cursor(cursor, fingerprint)
+            if resume is None:
+                return (
+                    "ERROR: Invalid or stale cursor (the file or filters changed). "
+                    "Start again without a cursor."
+                )
+            offset = resume[1]
 
-    # Find the file - try exact match first, then search
-    # Sanitize: strip path separators and traversal attempts
-    safe_file = Path(file).name  # extract just the filename, no directory components
-    target = export_dir / file
-    # Path traversal check
-    if not _path_is_contained(target, export_dir):
-        target = export_dir / safe_file  # fall back to just the filename
-
-    if not target.exists():
-        # Search subdirectories — only use the safe filename
-        matches = [f for f in export_dir.rglob(safe_file) if _path_is_contained(f, export_dir)]
-        if not matches:
-            # Try partial match with safe filename
-            matches = [f for f in export_dir.rglob(f"*{safe_file}*") if _path_is_contained(f, export_dir)]
-        if not matches:
-            available = [str(f.relative_to(export_dir)) for f in export_dir.rglob("*.csv")]
-            return f"File '{safe_file}' not found.\nAvailable files:\n" + "\n".join(f"  {f}" for f in available)
-        target = matches[0]
+        if sort_column is not None:
+            # The first sorted read of a column sorts the whole file; keep the
+            # event loop (crawl tailing, other tools) responsive meanwhile
+            sort_path, total_rows = await asyncio.to_thread(
+                _ensure_sort_index, target, header, data_start, sort_column, descending
+            )
 
-    # Final containment check
-    if not _path_is_contained(target, export_dir):
-        return "ERROR: Invalid file path."
-
-    try:
-        with open(target, "r", encoding="utf-8-sig") as f:
-            reader = csv.DictReader(f)
-            rows = []
-            skipped = 0
-            for row in reader:
-                # Apply filter
-                if filter_column and filter_value:
-                    cell = row.get(filter_column, "")
-                    if filter_value.lower() not in cell.lower():
-                        continue
+        rows = []
+        more = False  # whether rows remain after this page
+        last = None  # (ordinal or None, end offset or None) of the page's last row
+        total_matches = None
+        matched = None
+        match_key = (export_id, str(target.relative_to(export_dir)), fingerprint)
+        next_position = None
+
+        def read_page():
+            """Read this page; runs in a worker thread. A first pass over a
+            filter holds that filter's lock, so concurrent first reads scan once."""
+            nonlocal matched, more, last, total_matches, total_rows, next_position
+            first_pass = filtering and not resume and _cached_matches(match_key) is None
+            with _build_lock(match_key) if first_pass else contextlib.nullcontext():
+                matched = _cached_matches(match_key) if filtering else None
+                cols = _open_columnar(target)
+                try:
+                    with open(target, "rb") as fh:
+                        if cols is not None:
+                            # Columnar cache: filters decode only the cells they test,
+                            # and only the returned rows are decoded in full
+                            tested = _where_columns(ast, header)
+                            if needle is not None and col_idx is not None:
+                                tested.add(col_idx)
+
+                            def rows_at(ordinals):
+                                probe = [""] * len(header)
+                                for ordinal in ordinals:
+                                    for j in tested:
+                                        probe[j] = _columnar_cell(cols, j, ordinal)
+                                    yield ordinal, None, probe
+
+                            def scan():
+                                return _iter_columnar_probes(cols, len(header), tested)
+
+                            def full_row(ordinal, row):
+                                return _columnar_row(cols, ordinal)
+                        else:
+                            def rows_at(ordinals):
+                                index_path, _ = _ensure_row_index(target)
+                                return _iter_rows_at(fh, index_path, ordinals)
+
+                            def scan():
+                                return (
+                                    (ordinal, end, row)
+                                    for ordinal, (end, row) in enumerate(_iter_csv_rows(fh, data_start))
+                                )
+
+                            def full_row(ordinal, row):
+                                return row
+
+                        def take_page(ordinals):
+                            """Add this page's rows, given the ordinals of all matches."""
+                            nonlocal last
+                            for ordinal, end, row in rows_at(ordinals[offset:offset + limit]):
+                                rows.append(_project(full_row(ordinal, row), indices))
+                                last = (ordinal, end)
+
+                        if sort_column is not None:
+                            # Page through the cached sorted permutation. With a filter,
+                            # the match cache keeps a one-byte-per-row mask of the matches
+                            if not filtering:
+                                page = _sorted_ordinals(sort_path, offset, limit) if offset < total_rows else []
+                                for ordinal, end, row in rows_at(page):
+                                    rows.append(_project(full_row(ordinal, row), indices))
+                                    last = (ordinal, end)
+                                more = offset + len(rows) < total_rows
+                            else:
+                                if matched is None:
+                                    matched = array("B", bytes(total_rows))
+                                    if needle is None or col_idx is not None:
+                                        plan = _filter_plan(ast, filter_column, needle)
+                                        for ordinal, _ in _iter_matching_rows(target, header, data_start, plan, ()):
+                                            matched[ordinal] = 1
+                                    _cache_matches(match_key, matched)
+                                total_matches = matched.tobytes().count(1)
+                                take_page(_sorted_matches(sort_path, matched, offset + limit))
+                                more = offset + len(rows) < total_matches
+                        elif matched is not None:
+                            # Seen this filter before: page through the recorded row
+                            # ordinals instead of rescanning the file
+                            total_matches = len(matched)
+                            take_page(matched)
+                            more = offset + len(rows) < total_matches
+                        elif filtering and not resume:
+                            # First pass over this filter: check every row (or only the
+                            # candidates from the search indexes), recording each match's
+                            # ordinal so later pages and the count are free
+                            plan = _indexed_matches(target, header, ast, filter_column, needle)
+                            source = None
+                            if plan is not None and not plan[1]:
+                                total_rows = cols["rows"] if cols is not None else _ensure_row_index(target)[1]
+                                if len(plan[0]) <= INDEX_MAX_CANDIDATE_SHARE * total_rows:
+                                    source = rows_at(plan[0])
+
+                            if plan is not None and plan[1]:
+                                # The bitmap index answered the filter outright
+                                found = plan[0]
+                                take_page(found)
+                            elif source is None and cols is not None and np is not None and (
+                                needle is None or col_idx is not None
+                            ):
+                                # Vectorized: masks over whole row groups of the columnar cache
+                                found = _numpy_matches(cols, header, _filter_plan(ast, filter_column, needle))
+                                take_page(found)
+                            else:
+                                if source is None:
+                                    source = scan()
+                                found = array("I")
+                                for ordinal, end, row in source:
+                                    if not matches_filters(row):
+                                        continue
+                                    if offset <= len(found) < offset + limit:
+                                        rows.append(_project(full_row(ordinal, row), indices))
+                                        last = (ordinal, end)
+                                    found.append(ordinal)
+                            _cache_matches(match_key, found)
+                            total_matches = len(found)
+                            more = offset + len(rows) < total_matches
+                        elif filtering:
+                            # Cursor issued before the matches were cached (or since
+                            # evicted): resume the CSV scan where the previous page stopped
+                            for end, row in _iter_csv_rows(fh, resume[0]):
+                                if not matches_filters(row):
+                                    continue
+                                rows.append(_project(row, indices))
+                                if len(rows) >= limit:
+                                    last, more = (None, end), True
+                                    break
+                        elif cols is not None:
+                            # Unfiltered rows before this page = the first row's ordinal
+                            take_page(range(cols["rows"]))
+                            more = offset + len(rows) < cols["rows"]
+                        else:
+                            start = data_start
+                            if resume:
+                                start = resume[0]
+                            elif offset > 0:
+                                # Seek straight to the requested row via the sidecar index
+                                index_path, total_rows = _ensure_row_index(target)
+                                start = _row_offset(index_path, offset) if offset < total_rows else None
+                            if start is not None:
+                                for end, row in _iter_csv_rows(fh, start):
+                                    rows.append(_project(row, indices))
+                                    if len(rows) >= limit:
+                                        last, more = (None, end), True
+                                        break
+                finally:
+                    if cols is not None:
+                        _close_columnar(cols)
+
+            if more:
+                ordinal, next_position = last
+                if next_position is None:
+                    next_position = _position_after(target, ordinal)
+
+        # Scans and index builds stay off the event loop (crawl tailing, other tools)
+        await asyncio.to_thread(read_page)
+
+        if not rows:
+            return f"No matching rows in {file}."
+
+        # Build output
+        output = f"File: {target.relative_to(export_dir)}\n"
+        output += f"Showing rows {offset + 1}-{offset + len(rows)}"
+        if total_matches is not None:
+            output += f" of {total_matches:,} matches"
+        if filter_column:
+            output += f" (filtered: {filter_column} contains '{filter_value}')"
+        if where:
+            output += f" (where: {where})"
+        if sort_column is not None:
+            output += f" (sorted by {header[sort_column]} {'desc' if descending else 'asc'})"
+        output += f"\n\n"
+
+        output += _format_table([header[i] for i in indices], rows)
+
+        # Truncation note
+        if next_position is not None:
+            next_cursor = _encode_cursor(next_position, offset + len(rows), fingerprint)
+            output += (
+                f"\n... showing first {limit} rows. Use cursor='{next_cursor}' "
+                f"(or offset={offset + limit}) for next page."
+            )
 
-                if skipped < offset:
-                    skipped += 1
-                    continue
+        return output
 
-                rows.append(row)
-                if len(rows) >= limit:
-                    break
+    except Exception:
+        logger.exception("Failed to read export data")
+        return f"ERROR: Failed to read {Path(file).name}."
+
+
+@mcp.tool()
+async def query_crawl_data(
+    export_id: str,
+    file: str,
+    select: Optional[str] = None,
+    where: Optional[str] = None,
+    group_by: Optional[str] = None,
+    order_by: Optional[str] = None,
+    limit: int = 100,
+) -> str:
+    """
+    Query an exported CSV with SQL (SQLite). Use after export_crawl.
 
-            if not rows:
-                return f"No matching rows in {file}."
+    Column names containing spaces must be double-quoted, e.g. "Status Code".
 
-            # Format as text table
-            columns = list(rows[0].keys())
+    Args:
+        export_id: The export_id from export_crawl
+        file: CSV filename to query (from the file list in export_crawl output)
+        select: Optional select list (default *), e.g. '"Status Code", COUNT(*) AS urls'
+        where: Optional WHERE clause, e.g. '"Status Code" >= 400 AND "Word Count" < 200'
+        group_by: Optional GROUP BY clause, e.g. '"Status Code"'
+        order_by: Optional ORDER BY clause, e.g. '"Response Time" DESC'
+        limit: Max rows to return (default 100, max 1000)
 
-            # Build output
-            output = f"File: {target.relative_to(export_dir)}\n"
-            output += f"Showing rows {offset + 1}-{offset + len(rows)}"
-            if filter_column:
-                output += f" (filtered: {filter_column} contains '{filter_value}')"
-            output += f"\n\n"
+    Returns:
+        Query results as formatted text with column headers.
+    """
+    export_dir, target, err = _resolve_export_file(export_id, file)
+    if err:
+        return err
 
-            # Header
-            output += " | ".join(columns) + "\n"
-            output += "-+-".join("-" * min(len(c), 30) for c in columns) + "\n"
+    clauses = {"select": select, "where": where, "group_by": group_by, "order_by": order_by}
+    for name, clause in clauses.items():
+        if clause and ";" in clause:
+            return f"ERROR: {name} must be a single SQL expression (no ';')."
 
-            # Rows
-            for row in rows:
-                values = []
-                for col in columns:
-                    val = row.get(col, "")
-                    if len(val) > 80:
-                        val = val[:77] + "..."
-                    values.append(val)
-                output += " | ".join(values) + "\n"
+    db_path = export_dir / EXPORT_DB_NAME
+    try:
+        async with _ingest_locks.setdefault(export_id, asyncio.Lock()):
+            if not db_path.exists():
+                manifest = await asyncio.to_thread(_export_manifest, export_id)
+                await asyncio.to_thread(_ingest_export, export_dir, manifest=manifest)
+    except Exception:
+        logger.exception("Failed to load export into SQLite")
+        return "ERROR: Failed to load export into SQLite."
+
+    limit = max(1, min(limit, MAX_QUERY_ROWS))
+    rel_path = str(target.relative_to(export_dir))
+    # Queries may run up to QUERY_TIMEOUT_SECONDS; keep them off the event loop
+    return await asyncio.to_thread(_run_query, db_path, rel_path, select, where, group_by, order_by, limit)
+
+
+def _run_query(
+    db_path: Path,
+    rel_path: str,
+    select: Optional[str],
+    where: Optional[str],
+    group_by: Optional[str],
+    order_by: Optional[str],
+    limit: int,
+) -> str:
+    """Run a query_crawl_data query against an export database and format the result."""
+    try:
+        conn = sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri=True)
+    except sqlite3.Error:
+        logger.exception("Failed to open export database")
+        return "ERROR: Failed to open export database."
+
+    try:
+        found = conn.execute("SELECT table_name FROM sf_files WHERE file = ?", (rel_path,)).fetchone()
+        if not found:
+            return f"File '{rel_path}' is not in the export database. Re-run export_crawl."
+
+        sql = f"SELECT {select or '*'} FROM {_quote_ident(found[0])}"
+        if where:
+            sql += f" WHERE {where}"
+        if group_by:
+            sql += f" GROUP BY {group_by}"
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        sql += " LIMIT ?"
+
+        conn.set_authorizer(_query_authorizer)
+        deadline = time.monotonic() + QUERY_TIMEOUT_SECONDS
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+
+        cursor = conn.execute(sql, (limit,))
+        columns = [d[0] for d in cursor.description]
+        rows = cursor.fetchall()
+    except sqlite3.OperationalError as e:
+        if "interrupted" in str(e):
+            return f"ERROR: Query timed out ({QUERY_TIMEOUT_SECONDS}s limit)."
+        return f"ERROR: Invalid query: {e}"
+    except sqlite3.DatabaseError as e:
+        return f"ERROR: Invalid query: {e}"
+    finally:
+        conn.close()
+
+    if not rows:
+        return f"No matching rows in {rel_path}."
+
+    output = f"File: {rel_path}\n"
+    output += f"Query: {sql.replace(' LIMIT ?', f' LIMIT {limit}')}\n"
+    output += f"Showing {len(rows)} row(s)\n\n"
+    output += _format_table(columns, rows)
+    if len(rows) == limit:
+        output += f"\n... result capped at {limit} rows. Narrow the query or aggregate with group_by."
+    return output
+
+
+@mcp.tool()
+async def aggregate_crawl_data(
+    export_id: str,
+    file: str,
+    group_by: Optional[str] = None,
+    metrics: Optional[str] = None,
+    where: Optional[str] = None,
+    limit: int = 100,
+) -> str:
+    """
+    Count and summarize an exported CSV in one pass, optionally per group. Use after export_crawl.
+
+    Args:
+        export_id: The export_id from export_crawl
+        file: CSV filename to aggregate (from the file list in export_crawl output)
+        group_by: Optional comma-separated group expressions: column names,
+            directory(Address) (first path directory; directory(Address, 2) for two levels)
+            or bucket(Word Count, 500) (numeric ranges). Default: one group for the file.
+        metrics: Optional comma-separated metrics (default 'count'): count, count(col)
+            (non-empty cells), sum(col), min(col), max(col), mean(col). Non-numeric
+            cells are skipped by sum/min/max/mean.
+        where: Optional filter expression, same syntax as read_crawl_data,
+            e.g. 'Indexability = Indexable AND Status Code = 200'
+        limit: Max groups to return (default 100, max 1000)
 
-            # Truncation note
-            if len(rows) == limit:
-                output += f"\n... showing first {limit} rows. Use offset={offset + limit} for next page."
+    Returns:
+        One row per group, largest groups first (bucket groups in range order).
+    """
+    export_dir, target, err = _resolve_export_file(export_id, file)
+    if err:
+        return err
 
-            return output
+    try:
+        header, data_start = _read_csv_header(target)
+        groups, err = _parse_group_by(group_by, header)
+        if err:
+            return err
+        metric_specs, err = _parse_metrics(metrics, header)
+        if err:
+            return err
+
+        ast = None
+        if where:
+            try:
+                ast = _parse_where(where)
+                _compile_predicate(ast, header)
+            except ValueError as e:
+                return f"ERROR: Invalid where clause: {e}"
 
+        matched, accumulators = await asyncio.to_thread(
+            _aggregate_file, target, header, data_start, ast, groups, metric_specs
+        )
     except Exception:
-        logger.exception("Failed to read export data")
-        return f"ERROR: Failed to read {safe_file}."
+        logger.exception("Failed to aggregate export data")
+        return f"ERROR: Failed to aggregate {Path(file).name}."
+
+    if not matched:
+        return f"No matching rows in {file}."
+
+    if any(kind == "bucket" for _, _, kind, _ in groups):
+        ordered = sorted(accumulators.items(), key=lambda item: [(k is None, k) for k in item[0]])
+    else:
+        ordered = sorted(accumulators.items(), key=lambda item: (-item[1][0], item[0]))
+
+    limit = max(1, min(limit, MAX_QUERY_ROWS))
+    rows = []
+    for key, acc in ordered[:limit]:
+        cells = []
+        for value, (_, _, kind, arg) in zip(key, groups):
+            if kind == "bucket":
+                cells.append("(non-numeric)" if value is None else f"{value:g} - {value + arg:g}")
+            else:
+                cells.append(value)
+        for state, (_, func, j) in zip(acc[1:], metric_specs):
+            if j is None:
+                value = acc[0]
+            elif func == "count":
+                value = state[0]
+            elif not state[0]:
+                value = None
+            elif func == "sum":
+                value = state[1]
+            elif func == "mean":
+                value = state[1] / state[0]
+            else:
+                value = state[2] if func == "min" else state[3]
+            cells.append(_format_metric(value))
+        rows.append(cells)
+
+    output = f"File: {target.relative_to(export_dir)}\n"
+    output += f"Aggregated {matched:,} row(s) into {len(accumulators):,} group(s)"
+    if where:
+        output += f" (where: {where})"
+    output += "\n\n"
+    output += _format_table([g[0] for g in groups] + [m[0] for m in metric_specs], rows)
+    if len(accumulators) > limit:
+        output += f"\n... showing first {limit} of {len(accumulators):,} groups."
+    return output
+
+
+@mcp.tool()
+async def top_k_crawl_data(
+    export_id: str,
+    file: str,
+    column: str,
+    k: int = 20,
+    order: str = "desc",
+    where: Optional[str] = None,
+    columns: Optional[str] = None,
+) -> str:
+    """
+    Find the rows with the largest (or smallest) values in a numeric column,
+    e.g. the 20 slowest pages or 50 heaviest images. Use after export_crawl.
+
+    Streams the file through a bounded heap, so it works on multi-million-row
+    exports without sorting or loading them.
+
+    Args:
+        export_id: The export_id from export_crawl
+        file: CSV filename (from the file list in export_crawl output)
+        column: Numeric column to rank by, e.g. 'Response Time' or 'Size (bytes)'.
+            Rows where it isn't a number are skipped.
+        k: Number of rows to return (default 20, max 1000)
+        order: 'desc' for the largest values (default) or 'asc' for the smallest
+        where: Optional filter expression, same syntax as read_crawl_data
+        columns: Optional comma-separated column names to return (default: all)
+
+    Returns:
+        The top rows as formatted text, ranked; ties keep file order.
+    """
+    if order.lower() not in ("desc", "asc"):
+        return "ERROR: order must be 'desc' or 'asc'."
+    descending = order.lower() == "desc"
+    k = max(1, min(k, MAX_QUERY_ROWS))
+
+    export_dir, target, err = _resolve_export_file(export_id, file)
+    if err:
+        return err
+
+    try:
+        header, data_start = _read_csv_header(target)
+        ranked, err = _resolve_columns(header, column)
+        if err:
+            return err
+        j = ranked[0]
+        indices, err = _resolve_columns(header, columns)
+        if err:
+            return err
+        if j not in indices:
+            indices.insert(0, j)
+
+        ast = None
+        if where:
+            try:
+                ast = _parse_where(where)
+                _compile_predicate(ast, header)
+            except ValueError as e:
+                return f"ERROR: Invalid where clause: {e}"
+
+        considered, rows = await asyncio.to_thread(
+            _top_k_rows, target, header, data_start, ast, j, k, descending
+        )
+        if not rows:
+            return f"No rows with a numeric {header[j]} in {file}."
+    except Exception:
+        logger.exception("Failed to rank export data")
+        return f"ERROR: Failed to read {Path(file).name}."
+
+    output = f"File: {target.relative_to(export_dir)}\n"
+    output += (
+        f"Top {len(rows)} of {considered:,} row(s) by {header[j]} "
+        f"({'highest' if descending else 'lowest'} first)"
+    )
+    if where:
+        output += f" (where: {where})"
+    output += "\n\n"
+    output += _format_table([header[i] for i in indices], [_project(row, indices) for row in rows])
+    return output
 
 
 @mcp.tool()